@@ -1,5 +1,8 @@
+import argparse
+import mmap
 import os
 import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -7,29 +10,242 @@ THIRD_PARTY_DIR = PROJECT_ROOT / "third_party"
 if str(THIRD_PARTY_DIR) not in sys.path:
     sys.path.insert(0, str(THIRD_PARTY_DIR))
 
-from clearvoice import ClearVoice
+TASK_NAME = 'speech_enhancement'
+MODEL_NAME = 'MossFormer2_SE_48K'
+OUTPUT_SUFFIX = '_enhanced'
+# 批处理模式下每处理 N 个文件释放一次 CUDA 缓存，保持显存占用有界
+EMPTY_CACHE_EVERY = 20
+# 推理后端：'torch' 使用 PyTorch eager 图；'onnx' 首次运行时导出并融合 ONNX 图，缓存在模型权重目录旁
+BACKEND = 'torch'
+ONNX_OPSET = 17
+# ONNX 后端在有 CUDA 时优先使用 TensorRT EP（FP16 + 引擎缓存），首次构建引擎耗时较长，之后直接加载缓存
+TRT_FP16 = True
+TRT_MAX_WORKSPACE_SIZE = 2 * 1024 ** 3
+# 固定分块长度（秒）：设置后所有输入都按该长度的窗口分段解码，ONNX/TensorRT 按这一固定形状导出和构建引擎
+CHUNK_SECONDS = None
+# CPU 量化：'none' 保持 FP32；'int8' 对 Linear 层做动态 INT8 量化，仅在 CPU 支持 VNNI/AMX INT8 指令时启用
+QUANTIZE = 'none'
+INT8_CPU_FLAGS = ('avx512_vnni', 'avx_vnni', 'amx_int8')
+# 推理精度：'bf16'/'fp16' 只让掩码网络前向走 autocast，STFT/iSTFT 和特征计算保持 FP32
+PRECISION = 'fp32'
+# CPU 推理线程数：小 batch 推理时线程过多反而因争用变慢，默认最多 4 个
+NUM_THREADS = 4
 
-# 初始化语音增强模型
-cv_se = ClearVoice(
-    task='speech_enhancement',
-    model_names=['MossFormer2_SE_48K']
-)
+# 解析命令行参数
+# - 单文件模式：python demo_se.py <输入音频文件路径>
+# - 批处理模式：python demo_se.py --batch < jobs.tsv，每行 "输入路径\t输出路径"，输出路径可省略
+# - 列表模式：python demo_se.py --scp list.scp，每行第一个字段为输入路径
+parser = argparse.ArgumentParser(description='MossFormer2_SE_48K 语音增强 demo')
+parser.add_argument('input_path', nargs='?', help='输入音频文件路径（单文件模式）')
+parser.add_argument('--batch', action='store_true', help='批处理模式：模型只加载一次，从标准输入逐行读取任务')
+parser.add_argument('--scp', help='.scp 列表文件：启动时一次性解析全部输入路径，模型只加载一次')
+parser.add_argument('--backend', choices=['torch', 'onnx'], default=BACKEND, help='推理后端：torch 为 PyTorch eager，onnx 为 ONNX Runtime')
+parser.add_argument('--quantize', choices=['none', 'int8'], default=QUANTIZE, help='CPU 推理时对 Linear 层做动态 INT8 量化')
+parser.add_argument('--precision', choices=['fp32', 'bf16', 'fp16'], default=PRECISION, help='掩码网络前向使用的精度')
+parser.add_argument('--channels-last', action='store_true', help='GPU 推理时将卷积权重转为 channels_last 布局（仅 torch 后端）')
+parser.add_argument('--chunk-seconds', type=int, choices=[2, 4, 8], default=CHUNK_SECONDS, help='按固定长度分块解码，ONNX 后端导出该长度的静态形状图')
+parser.add_argument('--jit', action='store_true', help='使用 TorchScript 脚本化并缓存的模型（仅 torch 后端）')
+parser.add_argument('--compile', action='store_true', help='使用 torch.compile 编译掩码网络（仅 torch 后端，与 --jit 互斥）')
+parser.add_argument('--threads', type=int, default=NUM_THREADS, help='CPU 推理线程数（OpenMP/MKL/intra-op）')
+parser.add_argument('--start', type=float, default=None, help='只处理从该秒数开始的片段')
+parser.add_argument('--duration', type=float, default=None, help='只处理该时长（秒）的片段，默认到文件结尾')
+args = parser.parse_args()
 
-# 检查命令行参数
-if len(sys.argv) != 2:
+if not args.batch and not args.scp and args.input_path is None:
     print("使用方法: python demo_se.py <输入音频文件路径>")
+    print("批处理:   python demo_se.py --batch < jobs.tsv  (每行: 输入路径\\t输出路径)")
+    print("列表文件: python demo_se.py --scp list.scp")
     sys.exit(1)
 
-# 处理单个音频文件
-input_path = sys.argv[1]
-output_wav = cv_se(
-    input_path=input_path,
-    online_write=False
+# 线程数要在导入 torch 之前写入环境变量，OpenMP/MKL 线程池才会按这个大小创建
+num_threads = max(1, min(args.threads, os.cpu_count() or 1))
+os.environ['OMP_NUM_THREADS'] = str(num_threads)
+os.environ['MKL_NUM_THREADS'] = str(num_threads)
+
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
+from clearvoice import ClearVoice
+
+torch.set_num_threads(num_threads)
+torch.set_num_interop_threads(1)
+torch.backends.mkldnn.enabled = True
+
+# 初始化语音增强模型（整个进程只加载一次）
+cv_se = ClearVoice(
+    task=TASK_NAME,
+    model_names=[MODEL_NAME]
 )
 
-# 保存增强后的音频到输入文件相同目录
-input_dir = os.path.dirname(input_path)
-input_filename = os.path.basename(input_path)
-output_filename = os.path.splitext(input_filename)[0] + '_enhanced' + os.path.splitext(input_filename)[1]
-output_path = os.path.join(input_dir, output_filename)
-cv_se.write(output_wav, output_path=output_path)
+se_model = cv_se.models[0]
+
+# 固定分块：one_time_decode_length=0 让所有输入都走分段解码，窗口长度即分块长度，每个窗口形状完全相同
+chunk_frames = None
+if args.chunk_seconds:
+    se_model.args.decode_window = args.chunk_seconds
+    se_model.args.one_time_decode_length = 0
+    chunk_samples = se_model.args.sampling_rate * args.chunk_seconds
+    # Kaldi fbank（snip_edges）在 chunk_samples 个采样点上得到的帧数
+    chunk_frames = 1 + (chunk_samples - se_model.args.win_len) // se_model.args.win_inc
+
+# 低精度推理：CPU 上 fp16 autocast 支持有限，改用 bf16；GPU 不支持 bf16 时退回 FP32
+precision = args.precision
+if precision == 'fp16' and se_model.device.type == 'cpu':
+    print('CPU 推理不支持 fp16，改用 bf16', file=sys.stderr)
+    precision = 'bf16'
+if precision == 'bf16' and se_model.device.type == 'cuda' and not torch.cuda.is_bf16_supported():
+    print('当前 GPU 不支持 bf16，保持 FP32', file=sys.stderr)
+    precision = 'fp32'
+se_model.args.precision = precision
+
+# 动态 INT8 量化只对 CPU 上的 PyTorch 后端生效；没有 INT8 点积指令的 CPU 上量化反而更慢，保持 FP32
+quantized = False
+if args.quantize == 'int8':
+    cpu_flags = set()
+    if os.path.isfile('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    cpu_flags = set(line.split(':', 1)[1].split())
+                    break
+    if se_model.device.type != 'cpu':
+        print('INT8 动态量化仅用于 CPU 推理，已跳过', file=sys.stderr)
+    elif not cpu_flags.intersection(INT8_CPU_FLAGS):
+        print(f'CPU 不支持 {"/".join(INT8_CPU_FLAGS)}，跳过 INT8 量化，保持 FP32', file=sys.stderr)
+    else:
+        if 'onednn' in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = 'onednn'
+        se_model.model = torch.ao.quantization.quantize_dynamic(
+            se_model.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        quantized = True
+
+# channels_last：把 FSMN/稠密块中 Conv2d 的权重改为 NHWC 布局，cuDNN 在 Ampere 及以上 GPU 上走 Tensor Core 的 NHWC kernel；
+# Conv2d 的 4D 输入在模型内部构造，卷积会跟随权重布局，无需在外部转换输入
+if args.channels_last and args.backend == 'torch':
+    if se_model.device.type == 'cuda':
+        se_model.model = se_model.model.to(memory_format=torch.channels_last)
+    else:
+        print('channels_last 仅对 CUDA 推理有效，已跳过', file=sys.stderr)
+
+# TorchScript：首次运行脚本化并做 optimize_for_inference（冻结常量、折叠 LayerNorm/Conv-BN、去掉 dropout），
+# 结果缓存在模型权重目录，之后直接 torch.jit.load；脚本化失败时保持 eager 模型
+if args.jit and args.backend == 'torch':
+    jit_suffix = '.int8' if quantized else ''
+    jit_path = Path(se_model.args.checkpoint_dir) / f'{MODEL_NAME.lower()}{jit_suffix}.scripted.pt'
+    try:
+        if jit_path.is_file():
+            se_model.model = torch.jit.load(str(jit_path), map_location=se_model.device)
+        else:
+            print(f'脚本化模型: {jit_path}', file=sys.stderr)
+            scripted_model = torch.jit.script(se_model.model.eval())
+            scripted_model = torch.jit.optimize_for_inference(scripted_model)
+            scripted_model.save(str(jit_path))
+            se_model.model = scripted_model
+    except Exception as exc:
+        print(f'TorchScript 不可用，使用 eager 模型: {exc}', file=sys.stderr)
+
+# torch.compile：GPU 上用 reduce-overhead 模式（CUDA Graph 捕获，摊薄 kernel 启动开销）；
+# 长音频按固定 4s 窗口解码，窗口形状一致，只在首个窗口和短输入时触发编译
+if args.compile and args.backend == 'torch' and not args.jit:
+    compile_mode = 'reduce-overhead' if se_model.device.type == 'cuda' else 'default'
+    se_model.model = torch.compile(se_model.model, mode=compile_mode, fullgraph=False)
+
+# 切换到 ONNX Runtime 后端：ClearVoice 仍负责音频读写和特征计算，只替换掩码网络的前向
+if args.backend == 'onnx':
+    from clearvoice.utils.onnx_backend import OnnxMaskNet, export_onnx
+
+    onnx_path = Path(se_model.args.checkpoint_dir) / f'{MODEL_NAME}.onnx'
+    if chunk_frames:
+        onnx_path = Path(se_model.args.checkpoint_dir) / f'{MODEL_NAME.lower()}_L{chunk_samples}.onnx'
+    try:
+        if not onnx_path.is_file():
+            print(f'导出 ONNX 模型: {onnx_path}', file=sys.stderr)
+            export_onnx(se_model.model, onnx_path, se_model.args.num_mels, opset=ONNX_OPSET, num_frames=chunk_frames)
+        onnx_providers = None
+        if torch.cuda.is_available():
+            trt_cache_dir = Path(se_model.args.checkpoint_dir) / 'trt_cache'
+            trt_cache_dir.mkdir(parents=True, exist_ok=True)
+            onnx_providers = [
+                ('TensorrtExecutionProvider', {
+                    'trt_fp16_enable': TRT_FP16,
+                    'trt_engine_cache_enable': True,
+                    'trt_engine_cache_path': str(trt_cache_dir),
+                    'trt_max_workspace_size': TRT_MAX_WORKSPACE_SIZE,
+                }),
+                'CUDAExecutionProvider',
+                'CPUExecutionProvider',
+            ]
+        se_model.model = OnnxMaskNet(onnx_path, providers=onnx_providers)
+    except Exception as exc:
+        print(f'ONNX 后端不可用，回退到 PyTorch: {exc}', file=sys.stderr)
+
+# 指定 --start/--duration 时按区间解码输入，走 ClearVoice 的 numpy 输入模式
+clip_mode = args.start is not None or args.duration is not None
+target_sr = se_model.args.sampling_rate
+
+# 单文件模式等价于只向批处理循环输入一行
+# .scp 模式在启动时用 mmap 一次性读入并解析，每行取第一个字段作为输入路径（与 ClearVoice 的 .scp 约定一致）
+if args.scp:
+    job_lines = []
+    if os.path.getsize(args.scp) > 0:
+        with open(args.scp, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as scp_map:
+            job_lines = [line.split(None, 1)[0].decode('utf-8') for line in scp_map[:].splitlines() if line.strip()]
+elif args.batch:
+    job_lines = sys.stdin
+else:
+    job_lines = [args.input_path]
+
+processed_count = 0
+failed_count = 0
+# inference_mode 在整个任务循环外只进入一次，关闭 autograd 以及原地操作的版本计数
+with torch.inference_mode():
+    for line in job_lines:
+        fields = line.rstrip('\r\n').split('\t')
+        input_path = fields[0].strip()
+        if not input_path:
+            continue
+
+        # 未指定输出路径时，保存到输入文件相同目录
+        if len(fields) > 1 and fields[1].strip():
+            output_path = fields[1].strip()
+        else:
+            input_file = Path(input_path)
+            output_path = str(input_file.with_name(input_file.stem + OUTPUT_SUFFIX + input_file.suffix))
+
+        try:
+            # ClearVoice 的进度信息改写到标准错误，标准输出只保留 OK/ERR 结果行
+            # online_write=True 时结果直接按块写入 output_path，不在内存中保留整段增强音频
+            with redirect_stdout(sys.stderr):
+                if clip_mode:
+                    # 只解码 [start, start + duration) 区间，不先读整段文件再切片
+                    source_sr = torchaudio.info(input_path).sample_rate
+                    frame_offset = int((args.start or 0.0) * source_sr)
+                    num_frames = int(args.duration * source_sr) if args.duration else -1
+                    clip, clip_sr = torchaudio.load(input_path, frame_offset=frame_offset, num_frames=num_frames)
+                    clip = clip.mean(dim=0, keepdim=True)
+                    if clip_sr != target_sr:
+                        clip = torchaudio.functional.resample(clip, clip_sr, target_sr)
+                    output_wav = cv_se(clip.numpy(), False)
+                    output_dir = os.path.dirname(output_path)
+                    if output_dir:
+                        os.makedirs(output_dir, exist_ok=True)
+                    sf.write(output_path, np.clip(output_wav[0, :], -1.0, 1.0), target_sr, subtype='PCM_16')
+                else:
+                    cv_se(
+                        input_path=input_path,
+                        online_write=True,
+                        output_path=output_path
+                    )
+            print(f'OK\t{output_path}', flush=True)
+        except Exception as exc:
+            failed_count += 1
+            print(f'ERR\t{input_path}\t{exc}', flush=True)
+
+        processed_count += 1
+        if torch.cuda.is_available() and processed_count % EMPTY_CACHE_EVERY == 0:
+            torch.cuda.empty_cache()
+
+if failed_count:
+    sys.exit(1)
@@ -8,11 +8,18 @@ if str(THIRD_PARTY_DIR) not in sys.path:
 
 from clearvoice import ClearVoice  # 导入用于语音处理任务的 ClearVoice 类
 
+# 已加载的模型，按模型名缓存；多个演示块都打开时同一个模型只加载一次
+LOADED_MODELS = {}
+
 if __name__ == '__main__':
     ## ----------------- 演示一：使用单个模型 ----------------------
     if True:  # 此代码块演示如何使用单个模型进行语音增强
         # 初始化 ClearVoice，使用 MossFormer2_SE_48K 模型进行语音增强任务
-        myClearVoice = ClearVoice(task='speech_enhancement', model_names=['MossFormer2_SE_48K'])
+        # 只加载 LOADED_MODELS 中还没有的模型，再按 model_names 的顺序组装 myClearVoice.models
+        model_names = ['MossFormer2_SE_48K']
+        myClearVoice = ClearVoice(task='speech_enhancement', model_names=[name for name in model_names if name not in LOADED_MODELS])
+        LOADED_MODELS.update({model.name: model for model in myClearVoice.models})
+        myClearVoice.models = [LOADED_MODELS[name] for name in model_names]
 
         # 第一种调用方法： 
         #   处理输入波形并返回增强后的输出波形
@@ -41,7 +48,11 @@ if __name__ == '__main__':
     ## ---------------- 演示二：使用多个模型 -----------------------
     if False:  # 此代码块演示如何使用多个模型进行语音增强
         # 初始化 ClearVoice，使用两个模型进行语音增强任务：MossFormer2_SE_48K 和 FRCRN_SE_16K
-        myClearVoice = ClearVoice(task='speech_enhancement', model_names=['MossFormer2_SE_48K', 'FRCRN_SE_16K'])
+        # 演示一已加载的 MossFormer2_SE_48K 直接复用，这里只会新加载 FRCRN_SE_16K
+        model_names = ['MossFormer2_SE_48K', 'FRCRN_SE_16K']
+        myClearVoice = ClearVoice(task='speech_enhancement', model_names=[name for name in model_names if name not in LOADED_MODELS])
+        LOADED_MODELS.update({model.name: model for model in myClearVoice.models})
+        myClearVoice.models = [LOADED_MODELS[name] for name in model_names]
 
         # 第一种调用方法：
         #   使用多个模型处理输入波形并返回增强后的输出波形
@@ -1,28 +1,35 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from pathlib import Path
+import asyncio
+import importlib
 import threading
 import time
 import uuid
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from .analysis import build_analysis_payload
 from .runtime import (
     AUDIO_EXTENSIONS,
     DEFAULT_OUTPUT_DIR,
+    PRECISION_OPTIONS,
     EnhancementResult,
     ModelHandle,
     audio_mime_type,
     enhance_audio_file,
+    free_model_memory,
     list_sample_audio,
     load_mossformer2_se,
     make_output_path,
     model_checkpoint_dir,
     model_is_available,
+    prepare_input,
     resolve_project_output_dir,
     safe_filename,
     write_uploaded_audio_bytes,
@@ -34,7 +41,12 @@ APP_DIR = Path(__file__).resolve().parents[1]
 FRONTEND_DIR = APP_DIR / "frontend"
 APP_OUTPUT_ROOT = PROJECT_ROOT / "outputs" / "speech_enhance_web"
 UPLOAD_DIR = APP_OUTPUT_ROOT / "uploads"
+OUTPUT_CACHE_DIR = APP_OUTPUT_ROOT / "cache"
 MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+# Batch jobs share the one loaded model, so inference stays serialised behind _inference_lock;
+# the second worker lets one file's analysis plots overlap the next file's inference.
+BATCH_WORKERS = 2
+MAX_BATCH_FILES = 32
 
 
 @dataclass
@@ -47,7 +59,28 @@ class JobRecord:
     analysis: dict[str, object]
 
 
-app = FastAPI(title="LightClear Speech Enhance Web", version="1.0.0")
+def preload_model_handle() -> None:
+    if model_is_available(PROJECT_ROOT):
+        try:
+            get_model_handle()
+        except Exception:
+            # Leave the handle empty; the first enhancement request retries the load and reports the error.
+            pass
+    # Warm the plotting stack too, off the startup path and whether or not the weights are present,
+    # so the first analysis does not pay for it.
+    importlib.import_module(f"{__package__}.analysis")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Load the model in the background while the user picks audio, so the first request
+    # only waits for whatever is left of the load instead of all of it.
+    threading.Thread(target=preload_model_handle, name="model-preload", daemon=True).start()
+    yield
+    release_model_handle()
+
+
+app = FastAPI(title="LightClear Speech Enhance Web", version="1.0.0", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 
 _model_handle: ModelHandle | None = None
@@ -55,6 +88,10 @@ _model_lock = threading.Lock()
 _inference_lock = threading.Lock()
 _jobs: dict[str, JobRecord] = {}
 _jobs_lock = threading.Lock()
+_batch_pool = ThreadPoolExecutor(BATCH_WORKERS, "enhance-batch")
+_prepare_pool = ThreadPoolExecutor(1, "prepare-input")
+_pending_prepares: dict[Path, Future] = {}
+_prepare_lock = threading.Lock()
 
 
 def project_relative(path: Path) -> str:
@@ -65,12 +102,29 @@ def project_relative(path: Path) -> str:
         return str(resolved_path)
 
 
-def get_model_handle() -> ModelHandle:
+def get_model_handle() -> tuple[ModelHandle, bool]:
     global _model_handle
-    with _model_lock:
+    # Only a handle that was ready without waiting is a hit; blocking behind the preload thread is not.
+    waited = not _model_lock.acquire(blocking=False)
+    if waited:
+        _model_lock.acquire()
+    try:
+        cache_hit = not waited and _model_handle is not None
         if _model_handle is None:
             _model_handle = load_mossformer2_se(PROJECT_ROOT)
-        return _model_handle
+        return _model_handle, cache_hit
+    finally:
+        _model_lock.release()
+
+
+def release_model_handle() -> bool:
+    global _model_handle
+    with _inference_lock, _model_lock:
+        released = _model_handle is not None
+        _model_handle = None
+    if released:
+        free_model_memory()
+    return released
 
 
 def resolve_sample_path(sample_path: str | None) -> Path:
@@ -106,6 +160,102 @@ def store_job(result: EnhancementResult, analysis: dict[str, object]) -> JobReco
     return record
 
 
+async def save_upload(file: UploadFile | None) -> Path:
+    if file is None or not file.filename:
+        raise HTTPException(status_code=400, detail="请上传音频文件。")
+    safe_name = safe_filename(file.filename)
+    if Path(safe_name).suffix.lower().lstrip(".") not in AUDIO_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="不支持的音频格式。")
+    data = await file.read()
+    if not data:
+        raise HTTPException(status_code=400, detail="上传文件为空。")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="上传文件超过 200MB。")
+    input_path, _ = write_uploaded_audio_bytes(data, UPLOAD_DIR, safe_name)
+    return input_path
+
+
+def validate_precision(precision: str) -> str:
+    precision = precision.strip().lower()
+    if precision not in PRECISION_OPTIONS:
+        raise HTTPException(status_code=400, detail="推理精度无效。")
+    return precision
+
+
+def resolve_output_dir(output_dir: str) -> Path:
+    try:
+        return resolve_project_output_dir(PROJECT_ROOT, output_dir)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def schedule_prepare(input_path: Path) -> None:
+    with _prepare_lock:
+        if input_path in _pending_prepares:
+            return
+        future = _prepare_pool.submit(prepare_input, PROJECT_ROOT, input_path)
+        _pending_prepares[input_path] = future
+
+    def forget(_: Future) -> None:
+        with _prepare_lock:
+            _pending_prepares.pop(input_path, None)
+
+    future.add_done_callback(forget)
+
+
+def wait_for_prepare(input_path: Path) -> None:
+    # A decode started on file selection finishes here instead of being repeated; if it
+    # failed, enhance_audio_file falls back to ClearVoice's own reader.
+    with _prepare_lock:
+        future = _pending_prepares.get(input_path)
+    if future is not None:
+        wait((future,))
+
+
+def run_enhancement_job(
+    input_path: Path,
+    output_dir: Path,
+    waveform_window: float,
+    plot_width: int | None,
+    precision: str,
+    total_start: float,
+) -> dict[str, object]:
+    output_path = make_output_path(output_dir, input_path)
+    model_ready_start = time.perf_counter()
+    model_handle, model_cache_hit = get_model_handle()
+    model_ready_seconds = time.perf_counter() - model_ready_start
+    wait_for_prepare(input_path)
+
+    with _inference_lock:
+        result = enhance_audio_file(
+            model_handle=model_handle,
+            input_path=input_path,
+            output_path=output_path,
+            model_ready_seconds=model_ready_seconds,
+            total_start_time=total_start,
+            model_cache_hit=model_cache_hit,
+            precision=precision,
+            output_cache_dir=OUTPUT_CACHE_DIR,
+        )
+
+    # matplotlib/scipy/numba are imported on first use rather than at server start
+    from .analysis import build_analysis_payload
+
+    analysis = build_analysis_payload(
+        result.input_path, result.output_path, waveform_window, plot_width, result.analysis_audio
+    )
+    # Jobs are kept for the whole session; keep their paths, not the decoded audio.
+    result.analysis_audio = None
+    record = store_job(result, analysis)
+    return build_result_payload(record)
+
+
+def clamp_waveform_seconds(seconds: float) -> float:
+    from .analysis import WAVEFORM_MAX_SECONDS
+
+    return max(1.0, min(float(seconds), WAVEFORM_MAX_SECONDS))
+
+
 def get_job(job_id: str) -> JobRecord:
     with _jobs_lock:
         record = _jobs.get(job_id)
@@ -131,13 +281,24 @@ def build_result_payload(record: JobRecord) -> dict[str, object]:
             "model_ready_seconds": result.model_ready_seconds,
             "process_seconds": result.process_seconds,
             "total_seconds": result.total_seconds,
+            "model_cache_hit": result.model_cache_hit,
+            "precision": result.precision,
+            "output_cache_hit": result.output_cache_hit,
         },
         "analysis": record.analysis,
         "logs": [
             f"输入: {project_relative(result.input_path)}",
             f"输出: {project_relative(result.output_path)}",
-            f"模型准备: {result.model_ready_seconds:.2f} 秒",
-            f"音频处理: {result.process_seconds:.2f} 秒",
+            (
+                "模型准备: 复用已加载模型"
+                if result.model_cache_hit
+                else f"模型准备: {result.model_ready_seconds:.2f} 秒"
+            ),
+            (
+                f"音频处理: 复用缓存结果 {result.process_seconds:.2f} 秒（{result.precision}）"
+                if result.output_cache_hit
+                else f"音频处理: {result.process_seconds:.2f} 秒（{result.precision}）"
+            ),
             f"总执行: {result.total_seconds:.2f} 秒",
         ],
     }
@@ -162,6 +323,7 @@ def health() -> dict[str, object]:
         "model_name": "MossFormer2_SE_48K",
         "task": "speech_enhancement",
         "model_available": model_is_available(PROJECT_ROOT),
+        "model_loaded": _model_handle is not None,
         "checkpoint_dir": project_relative(checkpoint_dir),
         "sample_count": len(samples),
         "default_output_dir": DEFAULT_OUTPUT_DIR,
@@ -189,61 +351,94 @@ def sample_audio(path: str) -> FileResponse:
     return FileResponse(sample_path, media_type=audio_mime_type(sample_path))
 
 
+@app.post("/api/prepare")
+async def prepare(
+    source_type: str = Form(...),
+    sample_path: str | None = Form(default=None),
+    file: UploadFile | None = File(default=None),
+) -> dict[str, object]:
+    source = source_type.strip().lower()
+    if source == "sample":
+        input_path = resolve_sample_path(sample_path)
+    elif source == "upload":
+        input_path = await save_upload(file)
+    else:
+        raise HTTPException(status_code=400, detail="音频来源无效。")
+    schedule_prepare(input_path)
+    return {"input_path": project_relative(input_path)}
+
+
 @app.post("/api/enhance")
 async def enhance(
     source_type: str = Form(...),
     sample_path: str | None = Form(default=None),
     output_dir: str = Form(default=DEFAULT_OUTPUT_DIR),
     waveform_seconds: float = Form(default=8.0),
+    plot_width: int | None = Form(default=None),
+    precision: str = Form(default="fp32"),
     file: UploadFile | None = File(default=None),
 ) -> dict[str, object]:
     total_start = time.perf_counter()
     source = source_type.strip().lower()
+    precision = validate_precision(precision)
 
     if source == "sample":
         input_path = resolve_sample_path(sample_path)
     elif source == "upload":
-        if file is None or not file.filename:
-            raise HTTPException(status_code=400, detail="请上传音频文件。")
-        safe_name = safe_filename(file.filename)
-        if Path(safe_name).suffix.lower().lstrip(".") not in AUDIO_EXTENSIONS:
-            raise HTTPException(status_code=400, detail="不支持的音频格式。")
-        data = await file.read()
-        if not data:
-            raise HTTPException(status_code=400, detail="上传文件为空。")
-        if len(data) > MAX_UPLOAD_BYTES:
-            raise HTTPException(status_code=413, detail="上传文件超过 200MB。")
-        input_path, _ = write_uploaded_audio_bytes(data, UPLOAD_DIR, safe_name)
+        input_path = await save_upload(file)
     else:
         raise HTTPException(status_code=400, detail="音频来源无效。")
 
+    resolved_output_dir = resolve_output_dir(output_dir)
+    waveform_window = clamp_waveform_seconds(waveform_seconds)
+
     try:
-        resolved_output_dir = resolve_project_output_dir(PROJECT_ROOT, output_dir)
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+        # Run the job off the event loop so prepare, waveform and release requests are served meanwhile.
+        return await run_in_threadpool(
+            run_enhancement_job,
+            input_path,
+            resolved_output_dir,
+            waveform_window,
+            plot_width,
+            precision,
+            total_start,
+        )
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"处理失败: {exc}") from exc
 
-    output_path = make_output_path(resolved_output_dir, input_path)
-    waveform_window = max(1.0, min(float(waveform_seconds), 30.0))
 
-    try:
-        model_ready_start = time.perf_counter()
-        model_handle = get_model_handle()
-        model_ready_seconds = time.perf_counter() - model_ready_start
-
-        with _inference_lock:
-            result = enhance_audio_file(
-                model_handle=model_handle,
-                input_path=input_path,
-                output_path=output_path,
-                model_ready_seconds=model_ready_seconds,
-                total_start_time=total_start,
+@app.post("/api/enhance/batch")
+async def enhance_batch(
+    output_dir: str = Form(default=DEFAULT_OUTPUT_DIR),
+    waveform_seconds: float = Form(default=8.0),
+    plot_width: int | None = Form(default=None),
+    precision: str = Form(default="fp32"),
+    files: list[UploadFile] = File(...),
+) -> dict[str, object]:
+    precision = validate_precision(precision)
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"一次最多处理 {MAX_BATCH_FILES} 个文件。")
+    input_paths = [await save_upload(file) for file in files]
+    resolved_output_dir = resolve_output_dir(output_dir)
+    waveform_window = clamp_waveform_seconds(waveform_seconds)
+
+    def run(input_path: Path) -> dict[str, object]:
+        try:
+            return run_enhancement_job(
+                input_path, resolved_output_dir, waveform_window, plot_width, precision, time.perf_counter()
             )
+        except Exception as exc:
+            # One bad file should not discard the rest of the batch.
+            return {"input_name": input_path.name, "error": f"处理失败: {exc}"}
 
-        analysis = build_analysis_payload(result.input_path, result.output_path, waveform_window)
-        record = store_job(result, analysis)
-        return build_result_payload(record)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"处理失败: {exc}") from exc
+    loop = asyncio.get_running_loop()
+    jobs = await asyncio.gather(*(loop.run_in_executor(_batch_pool, run, path) for path in input_paths))
+    return {"jobs": list(jobs)}
+
+
+@app.post("/api/model/release")
+def release_model() -> dict[str, object]:
+    return {"released": release_model_handle()}
 
 
 @app.get("/api/jobs/{job_id}/audio/{variant}")
@@ -259,6 +454,24 @@ def job_audio(job_id: str, variant: str) -> FileResponse:
     return FileResponse(path, media_type=audio_mime_type(path))
 
 
+@app.get("/api/jobs/{job_id}/waveform")
+def job_waveform(
+    job_id: str,
+    seconds: float = Query(8.0),
+    plot_width: int | None = Query(None),
+) -> dict[str, object]:
+    record = get_job(job_id)
+    waveform_window = clamp_waveform_seconds(seconds)
+    from .analysis import build_waveform_image
+
+    try:
+        waveform_image = build_waveform_image(record.input_path, record.output_path, waveform_window, plot_width)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"波形绘制失败: {exc}") from exc
+    record.analysis["waveform_image"] = waveform_image
+    return {"waveform_seconds": waveform_window, "waveform_image": waveform_image}
+
+
 @app.get("/api/jobs/{job_id}/download")
 def job_download(job_id: str) -> FileResponse:
     record = get_job(job_id)
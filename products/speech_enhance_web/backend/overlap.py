@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional JIT for the crossfade loop; falls back to in-place numpy
+    njit = None
+
+
+def crossfade_window(overlap: int) -> np.ndarray:
+    # Power-complementary Hann half: fade_in + (1 - fade_in) == 1 across the overlap.
+    return np.sin(0.5 * np.pi * (np.arange(overlap) + 0.5) / overlap) ** 2
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def crossfade_into(head: np.ndarray, tail: np.ndarray, fade_in: np.ndarray) -> None:
+        # head = tail * (1 - w) + head * w, in one pass and without temporaries.
+        for i in range(head.shape[0]):
+            weight = fade_in[i]
+            for channel in range(head.shape[1]):
+                previous = tail[i, channel]
+                head[i, channel] = previous + (head[i, channel] - previous) * weight
+
+else:
+
+    def crossfade_into(head: np.ndarray, tail: np.ndarray, fade_in: np.ndarray) -> None:
+        # Same blend as three in-place ops on head, so no overlap-sized arrays are allocated.
+        head -= tail
+        head *= fade_in[:, None]
+        head += tail
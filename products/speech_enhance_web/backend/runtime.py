@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable
+import gc
 import hashlib
+import os
 import re
+import shutil
 import sys
+import threading
 import time
 
 
@@ -13,12 +20,46 @@ MODEL_NAME = "MossFormer2_SE_48K"
 TASK_NAME = "speech_enhancement"
 DEFAULT_OUTPUT_DIR = "outputs/speech_enhance_web/enhanced"
 MODEL_ROOT = Path("/Users/boom/Model/SE")
+# Load-time inference optimisations, applied once after ClearVoice has loaded the weights.
+USE_CHANNELS_LAST = True  # CUDA only: NHWC weights for the FSMN / dense-block Conv2d layers
+USE_TORCHSCRIPT = True  # script + freeze + optimize_for_inference, cached next to the weights
+# torch.compile instead of TorchScript (opt-in: the first request of each new input shape pays the
+# compile). Inductor artifacts are cached next to the weights so restarts reuse them.
+USE_TORCH_COMPILE = False
+# Per-request inference precision: "bf16" runs the mask-network forward under autocast
+# (features, STFT/iSTFT and the weights stay fp32); "int8" (CPU only) uses a dynamically
+# quantized copy of the Linear layers, built on first use and cached next to the weights.
+PRECISION_OPTIONS = ("fp32", "bf16", "int8")
+# Long wav/flac inputs already at the model rate are enhanced in fixed windows read from and
+# written to disk as they go, so memory stays O(window) instead of O(file) during inference.
+STREAM_MIN_SECONDS = 60.0
+STREAM_CHUNK_SECONDS = 10.0
+STREAM_OVERLAP_SECONDS = 0.5
+STREAM_FORMATS = ("WAV", "FLAC")
+# Finished blocks are written by a separate thread so disk I/O overlaps the next block's inference;
+# at most this many blocks wait for the writer before inference pauses.
+STREAM_WRITE_BACKLOG = 4
+MODEL_SAMPLE_RATE = 48000
+# Inputs decoded and resampled ahead of time (when the user picks them), keyed by path, mtime and size.
+PREPARED_INPUT_CACHE_SIZE = 4
+
+# Enhanced outputs are cached by input content, weights version, device and precision, so enhancing
+# the same file again is a file copy instead of a forward pass. Oldest-used entries go past the cap.
+OUTPUT_CACHE_MAX_BYTES = 2 * 1024**3
+OUTPUT_CACHE_HASH_BLOCK = 1 << 20
+
+_prepared_inputs: OrderedDict[tuple[str, int, int], tuple[list, dict]] = OrderedDict()
+_prepared_inputs_lock = threading.Lock()
 
 
 @dataclass
 class ModelHandle:
     clearvoice: object
     initial_load_seconds: float
+    # The eager network is kept because TorchScript modules ignore autocast and int8 quantizes from it.
+    eager_model: object | None = None
+    scripted: bool = False
+    int8_model: object | None = None
 
 
 @dataclass
@@ -29,6 +70,12 @@ class EnhancementResult:
     model_ready_seconds: float
     process_seconds: float
     total_seconds: float
+    model_cache_hit: bool = False
+    precision: str = "fp32"
+    output_cache_hit: bool = False
+    # (original, enhanced, sample_rate) mono float32 arrays already in memory, handed to the
+    # analysis so it does not decode both files again; None means it reads the files.
+    analysis_audio: tuple[object, object, int] | None = None
 
 
 def bootstrap_project_paths(project_root: Path) -> None:
@@ -45,12 +92,93 @@ def load_mossformer2_se(project_root: Path) -> ModelHandle:
 
     start_time = time.perf_counter()
     clearvoice = ClearVoice(task=TASK_NAME, model_names=[MODEL_NAME])
+    eager_model = clearvoice.models[0].model
+    scripted = optimize_loaded_model(clearvoice)
     return ModelHandle(
         clearvoice=clearvoice,
         initial_load_seconds=time.perf_counter() - start_time,
+        eager_model=eager_model,
+        scripted=scripted,
     )
 
 
+def optimize_loaded_model(clearvoice: object) -> bool:
+    """Applies the load-time optimisations; returns True if the network was replaced by TorchScript."""
+    import torch
+
+    speech_model = clearvoice.models[0]
+    device = speech_model.device
+    checkpoint_dir = Path(speech_model.args.checkpoint_dir)
+    if device.type == "cuda":
+        # TF32 matmuls for the float32 parts of the forward.
+        torch.set_float32_matmul_precision("high")
+    if USE_CHANNELS_LAST and device.type == "cuda":
+        speech_model.model = speech_model.model.to(memory_format=torch.channels_last)
+
+    if USE_TORCH_COMPILE:
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(checkpoint_dir / "inductor_cache"))
+        # Upload lengths vary per request, so compile with dynamic shapes and without CUDA graphs
+        # (reduce-overhead would re-record a graph for every new length).
+        speech_model.model = torch.compile(speech_model.model, dynamic=True, fullgraph=False)
+        return False
+    if not USE_TORCHSCRIPT:
+        return False
+    script_path = checkpoint_dir / f"{MODEL_NAME.lower()}.{device.type}.scripted.pt"
+    eager_model = speech_model.model
+    try:
+        speech_model.model = load_or_script_model(lambda: eager_model, script_path, device)
+        return True
+    except Exception:
+        # Ops TorchScript cannot handle: keep the eager model.
+        return False
+
+
+def load_or_script_model(build_model: Callable[[], object], script_path: Path, device: object) -> object:
+    """Loads the cached TorchScript module while it is newer than the weights, else scripts and caches one."""
+    import torch
+
+    weights_mtime = (script_path.parent / "last_best_checkpoint").stat().st_mtime
+    if script_path.is_file() and script_path.stat().st_mtime >= weights_mtime:
+        return torch.jit.load(str(script_path), map_location=device)
+
+    scripted = torch.jit.optimize_for_inference(torch.jit.script(build_model().eval()))
+    try:
+        scripted.save(str(script_path))
+    except OSError:
+        pass  # read-only weights dir: script again on the next start
+    return scripted
+
+
+def get_int8_model(model_handle: ModelHandle) -> object:
+    speech_model = model_handle.clearvoice.models[0]
+    if speech_model.device.type != "cpu":
+        raise ValueError("int8 动态量化仅支持 CPU 推理。")
+    if model_handle.int8_model is not None:
+        return model_handle.int8_model
+
+    import torch
+
+    def quantize() -> object:
+        return torch.ao.quantization.quantize_dynamic(model_handle.eager_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    quantized = None
+    if USE_TORCHSCRIPT:
+        script_path = Path(speech_model.args.checkpoint_dir) / f"{MODEL_NAME.lower()}.int8.cpu.scripted.pt"
+        try:
+            quantized = load_or_script_model(quantize, script_path, speech_model.device)
+        except Exception:
+            quantized = None
+    model_handle.int8_model = quantized if quantized is not None else quantize()
+    return model_handle.int8_model
+
+
+def free_model_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
 def model_checkpoint_dir(project_root: Path) -> Path:
     return MODEL_ROOT / MODEL_NAME
 
@@ -119,19 +247,245 @@ def make_output_path(output_dir: Path, input_path: Path) -> Path:
     return output_dir / f"{path.stem}_enhanced_{timestamp}{path.suffix}"
 
 
+def should_stream(input_path: Path, sample_rate: int) -> bool:
+    import soundfile as sf
+
+    try:
+        info = sf.info(str(input_path))
+    except RuntimeError:
+        return False
+    return (
+        info.format in STREAM_FORMATS
+        and info.samplerate == sample_rate
+        and info.frames > STREAM_MIN_SECONDS * sample_rate
+    )
+
+
+def prepared_input_key(input_path: Path) -> tuple[str, int, int]:
+    stat = input_path.stat()
+    return str(input_path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def cached_prepared_input(input_path: Path) -> tuple[list, dict] | None:
+    try:
+        key = prepared_input_key(input_path)
+    except OSError:
+        return None
+    with _prepared_inputs_lock:
+        prepared = _prepared_inputs.get(key)
+        if prepared is not None:
+            _prepared_inputs.move_to_end(key)
+        return prepared
+
+
+def prepare_input(project_root: Path, input_path: Path) -> bool:
+    """Decodes and resamples input_path the way ClearVoice's DataReader does and caches it."""
+    if cached_prepared_input(input_path) is not None:
+        return True
+    if should_stream(input_path, MODEL_SAMPLE_RATE):
+        return False  # enhanced straight from disk; holding it in memory would defeat that
+
+    bootstrap_project_paths(project_root)
+    import numpy as np
+    from clearvoice.dataloader.dataloader import audioread
+
+    key = prepared_input_key(input_path)
+    # MossFormer2_SE_48K reads without normalisation, so the returned scalars are always 1.
+    audios, _, audio_info = audioread(str(input_path), MODEL_SAMPLE_RATE, False)
+    audios = [np.asarray(audio, dtype=np.float32).reshape(1, -1) for audio in audios]
+    with _prepared_inputs_lock:
+        _prepared_inputs[key] = (audios, audio_info)
+        while len(_prepared_inputs) > PREPARED_INPUT_CACHE_SIZE:
+            _prepared_inputs.popitem(last=False)
+    return True
+
+
+def enhance_prepared(
+    speech_model: object, prepared: tuple[list, dict], input_path: Path, output_path: Path
+) -> tuple[object, object, int] | None:
+    """Runs ClearVoice's per-file decode and write on an input decoded by prepare_input.
+
+    Returns the mono input/output arrays for the analysis when they match what it would read
+    back from the files, i.e. when the input is already at the model rate and was not resampled.
+    """
+    import numpy as np
+    import torch
+
+    audios, audio_info = prepared
+    speech_model.data = {
+        "audio": audios,
+        "id": input_path.name,
+        "audio_len": audios[0].shape[1],
+        **audio_info,
+    }
+    with torch.inference_mode():
+        output_audios = speech_model.decode()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    speech_model.write_audio(str(output_path), audio=output_audios)
+
+    if audio_info["sample_rate"] != MODEL_SAMPLE_RATE:
+        return None
+    if len(audios) == 1:
+        original = audios[0][0]
+    else:
+        original = np.mean([audio[0] for audio in audios], axis=0, dtype=np.float32)
+    # write_audio clips to full scale, so clip here too to match the written file.
+    enhanced = np.clip(output_audios.mean(axis=0), -1.0, 1.0).astype(np.float32)
+    return original, enhanced, MODEL_SAMPLE_RATE
+
+
+def enhance_streaming(speech_model: object, input_path: Path, output_path: Path) -> bool:
+    """Enhances input_path window by window with crossfaded overlaps; returns False if it does not apply."""
+    import numpy as np
+    import soundfile as sf
+    import torch
+    from clearvoice.utils.decode import decode_one_audio
+
+    from .overlap import crossfade_into, crossfade_window
+
+    sample_rate = speech_model.args.sampling_rate
+    if not should_stream(input_path, sample_rate):
+        return False
+
+    chunk = int(STREAM_CHUNK_SECONDS * sample_rate)
+    overlap = int(STREAM_OVERLAP_SECONDS * sample_rate)
+    fade_in = crossfade_window(overlap)
+
+    with (
+        torch.inference_mode(),
+        sf.SoundFile(str(input_path)) as source,
+        sf.SoundFile(
+            str(output_path),
+            "w",
+            samplerate=sample_rate,
+            channels=source.channels,
+            format=source.format,
+            subtype=source.subtype,
+        ) as target,
+        ThreadPoolExecutor(1, "stream-writer") as writer,
+    ):
+        # One writer thread keeps the blocks in order; waiting on the oldest write bounds memory.
+        pending_writes = deque()
+
+        def write(frames: np.ndarray) -> None:
+            pending_writes.append(writer.submit(target.write, frames))
+            if len(pending_writes) > STREAM_WRITE_BACKLOG:
+                pending_writes.popleft().result()
+
+        tail = None
+        for block in source.blocks(blocksize=chunk, overlap=overlap, dtype="float32", always_2d=True):
+            enhanced = np.stack(
+                [
+                    decode_one_audio(speech_model.model, speech_model.device, block[None, :, channel], speech_model.args)
+                    for channel in range(block.shape[1])
+                ],
+                axis=1,
+            )
+            # Each block after the first starts with the previous block's last `overlap` samples.
+            if tail is not None:
+                crossfade_into(enhanced[:overlap], tail, fade_in)
+            np.clip(enhanced, -1.0, 1.0, out=enhanced)
+            write(enhanced[:-overlap])
+            tail = enhanced[-overlap:]
+        if tail is not None:
+            write(tail)
+        for pending in pending_writes:
+            pending.result()
+    return True
+
+
+def output_cache_path(
+    speech_model: object, cache_dir: Path, input_path: Path, output_path: Path, precision: str
+) -> Path:
+    digest = hashlib.blake2b(digest_size=16)
+    with input_path.open("rb") as handle:
+        for block in iter(lambda: handle.read(OUTPUT_CACHE_HASH_BLOCK), b""):
+            digest.update(block)
+    weights_version = (Path(speech_model.args.checkpoint_dir) / "last_best_checkpoint").stat().st_mtime_ns
+    key = f"{digest.hexdigest()}_{MODEL_NAME.lower()}_{weights_version}_{speech_model.device.type}_{precision}"
+    return cache_dir / f"{key}{output_path.suffix}"
+
+
+def store_cached_output(output_path: Path, cache_path: Path) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+        evict_output_cache(cache_path.parent)
+    except OSError:
+        pass  # the output itself is already written; only the cache entry is lost
+
+
+def evict_output_cache(cache_dir: Path) -> None:
+    entries = []
+    for path in cache_dir.iterdir():
+        if path.is_file() and path.suffix != ".tmp":
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total_bytes = sum(size for _, size, _ in entries)
+    # Hits touch their entry's mtime, so the oldest mtime is the least recently used.
+    for _, size, path in sorted(entries):
+        if total_bytes <= OUTPUT_CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total_bytes -= size
+
+
+def run_model(
+    model_handle: ModelHandle, input_path: Path, output_path: Path, precision: str
+) -> tuple[object, object, int] | None:
+    speech_model = model_handle.clearvoice.models[0]
+    active_model = speech_model.model
+    if precision == "int8":
+        speech_model.model = get_int8_model(model_handle)
+    elif precision == "bf16":
+        speech_model.args.precision = precision
+        if model_handle.scripted:
+            speech_model.model = model_handle.eager_model
+
+    try:
+        prepared = cached_prepared_input(input_path)
+        if prepared is not None:
+            return enhance_prepared(speech_model, prepared, input_path, output_path)
+        if not enhance_streaming(speech_model, input_path, output_path):
+            output_wav = model_handle.clearvoice(
+                input_path=str(input_path),
+                online_write=False,
+            )
+            model_handle.clearvoice.write(output_wav, output_path=str(output_path))
+    finally:
+        speech_model.model = active_model
+        speech_model.args.precision = "fp32"
+    return None
+
+
 def enhance_audio_file(
     model_handle: ModelHandle,
     input_path: Path,
     output_path: Path,
     model_ready_seconds: float,
     total_start_time: float,
+    model_cache_hit: bool = False,
+    precision: str = "fp32",
+    output_cache_dir: Path | None = None,
 ) -> EnhancementResult:
+    speech_model = model_handle.clearvoice.models[0]
     process_start = time.perf_counter()
-    output_wav = model_handle.clearvoice(
-        input_path=str(input_path),
-        online_write=False,
-    )
-    model_handle.clearvoice.write(output_wav, output_path=str(output_path))
+    cache_path = None
+    if output_cache_dir is not None:
+        cache_path = output_cache_path(speech_model, output_cache_dir, input_path, output_path, precision)
+    output_cache_hit = cache_path is not None and cache_path.is_file()
+    analysis_audio = None
+
+    if output_cache_hit:
+        os.utime(cache_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cache_path, output_path)
+    else:
+        analysis_audio = run_model(model_handle, input_path, output_path, precision)
+        if cache_path is not None:
+            store_cached_output(output_path, cache_path)
     process_seconds = time.perf_counter() - process_start
 
     return EnhancementResult(
@@ -141,6 +495,10 @@ def enhance_audio_file(
         model_ready_seconds=model_ready_seconds,
         process_seconds=process_seconds,
         total_seconds=time.perf_counter() - total_start_time,
+        model_cache_hit=model_cache_hit,
+        precision=precision,
+        output_cache_hit=output_cache_hit,
+        analysis_audio=analysis_audio,
     )
 
 
@@ -4,7 +4,12 @@ const state = {
   busy: false,
   modelAvailable: false,
   activeTab: "waveform",
+  jobId: null,
   logs: [],
+  pendingLogs: [],
+  logFlushScheduled: false,
+  logSecond: -1,
+  logTimestamp: "",
 };
 
 const el = {};
@@ -28,10 +33,12 @@ function bindElements() {
     "outputDir",
     "waveformSeconds",
     "waveformSecondsText",
+    "precisionSelect",
     "enhanceButton",
     "enhanceButtonText",
     "busySpinner",
     "resetButton",
+    "releaseModelButton",
     "statusMessage",
     "resultStamp",
     "inputName",
@@ -70,20 +77,55 @@ function setStatus(text, isError = false) {
   el.statusMessage.style.color = isError ? "var(--danger)" : "var(--muted)";
 }
 
-function appendLog(message) {
-  const timestamp = new Date().toLocaleTimeString("zh-CN", { hour12: false });
-  state.logs.push(`[${timestamp}] ${message}`);
-  state.logs = state.logs.slice(-80);
-  el.logList.replaceChildren();
-  state.logs.forEach((line) => {
+const MAX_LOG_LINES = 80;
+const LOG_TIME_FORMAT = new Intl.DateTimeFormat("zh-CN", {
+  hour: "2-digit",
+  minute: "2-digit",
+  second: "2-digit",
+  hour12: false,
+});
+
+function flushLogs() {
+  // Lines logged within one frame are appended together, with a single layout and scroll.
+  const fragment = document.createDocumentFragment();
+  state.pendingLogs.forEach((line) => {
     const item = document.createElement("li");
     item.textContent = line;
-    el.logList.appendChild(item);
+    fragment.appendChild(item);
   });
+  state.pendingLogs = [];
+  state.logFlushScheduled = false;
+  el.logList.appendChild(fragment);
+  while (el.logList.childElementCount > MAX_LOG_LINES) {
+    el.logList.firstElementChild.remove();
+  }
   el.logCount.textContent = String(state.logs.length);
   el.logList.scrollTop = el.logList.scrollHeight;
 }
 
+function logTimestamp() {
+  // toLocaleTimeString builds a new locale formatter per call; reuse one and format once per second.
+  const second = Math.floor(Date.now() / 1000);
+  if (second !== state.logSecond) {
+    state.logSecond = second;
+    state.logTimestamp = LOG_TIME_FORMAT.format(second * 1000);
+  }
+  return state.logTimestamp;
+}
+
+function appendLog(message) {
+  const line = `[${logTimestamp()}] ${message}`;
+  state.logs.push(line);
+  if (state.logs.length > MAX_LOG_LINES) {
+    state.logs.shift();
+  }
+  state.pendingLogs.push(line);
+  if (!state.logFlushScheduled) {
+    state.logFlushScheduled = true;
+    window.requestAnimationFrame(flushLogs);
+  }
+}
+
 async function apiJson(url, options = {}) {
   const response = await fetch(url, options);
   const contentType = response.headers.get("content-type") || "";
@@ -117,9 +159,11 @@ function setBusy(isBusy) {
   el.uploadFile.disabled = isBusy;
   el.outputDir.disabled = isBusy;
   el.waveformSeconds.disabled = isBusy;
+  el.precisionSelect.disabled = isBusy;
   el.sampleSourceButton.disabled = isBusy;
   el.uploadSourceButton.disabled = isBusy;
   el.resetButton.disabled = isBusy;
+  el.releaseModelButton.disabled = isBusy;
   updateEnhanceButton();
 }
 
@@ -159,11 +203,35 @@ function updateInputPreview() {
     el.inputPath.textContent = "-";
     return;
   }
+  const count = el.uploadFile.files.length;
   el.originalAudio.src = URL.createObjectURL(file);
-  el.inputName.textContent = file.name;
+  el.inputName.textContent = count > 1 ? `${file.name} 等 ${count} 个文件` : file.name;
   el.inputPath.textContent = file.name;
 }
 
+async function prepareSelectedInput() {
+  // Start decoding/resampling the selected input on the server while the user is still choosing options.
+  const formData = new FormData();
+  formData.append("source_type", state.source);
+  if (state.source === "sample") {
+    const sample = selectedSample();
+    if (!sample) {
+      return;
+    }
+    formData.append("sample_path", sample.path);
+  } else {
+    if (el.uploadFile.files.length !== 1) {
+      return;
+    }
+    formData.append("file", el.uploadFile.files[0]);
+  }
+  try {
+    await apiJson("/api/prepare", { method: "POST", body: formData });
+  } catch (error) {
+    // Preparing is only a head start; enhancement reads the input itself if this failed.
+  }
+}
+
 function clearAnalysisPanels() {
   [
     [el.waveformImage, byId("waveformPanel")],
@@ -179,6 +247,7 @@ function clearAnalysisPanels() {
 }
 
 function resetResult(writeLog = true) {
+  state.jobId = null;
   el.enhancedAudio.removeAttribute("src");
   el.outputName.textContent = "无结果";
   el.outputName.classList.add("muted");
@@ -237,6 +306,7 @@ function renderMetrics(rows) {
 }
 
 function renderResult(data) {
+  state.jobId = data.job_id;
   el.enhancedAudio.src = data.output_audio_url;
   el.outputName.textContent = data.output_name;
   el.outputName.classList.remove("muted");
@@ -310,14 +380,76 @@ async function loadSamples() {
   }
   updateInputPreview();
   updateEnhanceButton();
+  prepareSelectedInput();
+}
+
+
+function plotPixelWidth() {
+  // Analysis images are rasterised at the plot area's device-pixel width instead of being downscaled.
+  const width = byId("waveformPanel").parentElement.clientWidth;
+  return Math.round(width * (window.devicePixelRatio || 1));
+}
+
+function renderBatchResult(payload) {
+  const jobs = payload.jobs || [];
+  const done = jobs.filter((job) => !job.error);
+  const shown = done[done.length - 1];
+  jobs.forEach((job) => {
+    if (job.error) {
+      appendLog(`${job.input_name}: ${job.error}`);
+    } else if (job !== shown) {
+      job.logs.forEach((line) => appendLog(line));
+    }
+  });
+  if (shown) {
+    // The player, plots and timing show the last finished file; every file is in the log.
+    renderResult(shown);
+  }
+  setStatus(`批量处理完成: ${done.length}/${jobs.length} 个文件`, done.length < jobs.length);
+}
+
+async function runBatchEnhancement(files) {
+  resetResult(false);
+  const formData = new FormData();
+  formData.append("output_dir", el.outputDir.value);
+  formData.append("waveform_seconds", el.waveformSeconds.value);
+  formData.append("plot_width", String(plotPixelWidth()));
+  formData.append("precision", el.precisionSelect.value);
+  files.forEach((file) => formData.append("files", file));
+  appendLog(`开始批量处理: ${files.length} 个文件`);
+
+  setBusy(true);
+  setBadge("status-busy", "处理中");
+  setStatus("批量处理请求已提交");
+
+  try {
+    const payload = await apiJson("/api/enhance/batch", {
+      method: "POST",
+      body: formData,
+    });
+    renderBatchResult(payload);
+    setBadge(state.modelAvailable ? "status-ready" : "status-missing", state.modelAvailable ? "模型就绪" : "模型未就绪");
+  } catch (error) {
+    appendLog(`处理失败: ${error.message}`);
+    setStatus(error.message, true);
+    setBadge(state.modelAvailable ? "status-ready" : "status-error", state.modelAvailable ? "模型就绪" : "处理失败");
+  } finally {
+    setBusy(false);
+  }
 }
 
 async function runEnhancement() {
+  if (state.source === "upload" && el.uploadFile.files.length > 1) {
+    await runBatchEnhancement(Array.from(el.uploadFile.files));
+    return;
+  }
   resetResult(false);
   const formData = new FormData();
   formData.append("source_type", state.source);
   formData.append("output_dir", el.outputDir.value);
   formData.append("waveform_seconds", el.waveformSeconds.value);
+  formData.append("plot_width", String(plotPixelWidth()));
+  formData.append("precision", el.precisionSelect.value);
 
   if (state.source === "sample") {
     const sample = selectedSample();
@@ -357,6 +489,40 @@ async function runEnhancement() {
   }
 }
 
+async function refreshWaveform() {
+  const jobId = state.jobId;
+  if (!jobId || state.busy) {
+    return;
+  }
+  try {
+    const query = new URLSearchParams({
+      seconds: el.waveformSeconds.value,
+      plot_width: String(plotPixelWidth()),
+    });
+    const payload = await apiJson(`/api/jobs/${jobId}/waveform?${query}`);
+    if (state.jobId === jobId) {
+      el.waveformImage.src = payload.waveform_image;
+    }
+  } catch (error) {
+    appendLog(`波形刷新失败: ${error.message}`);
+  }
+}
+
+async function releaseModel() {
+  el.releaseModelButton.disabled = true;
+  try {
+    const payload = await apiJson("/api/model/release", { method: "POST" });
+    const message = payload.released ? "已释放模型，下次增强会重新加载" : "模型尚未加载";
+    appendLog(message);
+    setStatus(message);
+  } catch (error) {
+    appendLog(`释放模型失败: ${error.message}`);
+    setStatus(error.message, true);
+  } finally {
+    el.releaseModelButton.disabled = state.busy;
+  }
+}
+
 function bindEvents() {
   el.sampleSourceButton.addEventListener("click", () => setSource("sample"));
   el.uploadSourceButton.addEventListener("click", () => setSource("upload"));
@@ -364,16 +530,20 @@ function bindEvents() {
     resetResult(false);
     updateInputPreview();
     updateEnhanceButton();
+    prepareSelectedInput();
   });
   el.uploadFile.addEventListener("change", () => {
     resetResult(false);
     updateInputPreview();
     updateEnhanceButton();
+    prepareSelectedInput();
   });
   el.waveformSeconds.addEventListener("input", () => {
     el.waveformSecondsText.textContent = `${el.waveformSeconds.value} 秒`;
   });
+  el.waveformSeconds.addEventListener("change", refreshWaveform);
   el.enhanceButton.addEventListener("click", runEnhancement);
+  el.releaseModelButton.addEventListener("click", releaseModel);
   el.resetButton.addEventListener("click", () => {
     resetResult(true);
     updateInputPreview();
@@ -1,83 +1,252 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 import base64
+import threading
 
-import librosa
 import matplotlib
 
 matplotlib.use("Agg")
 
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import matplotlib.font_manager as fm
-import matplotlib.pyplot as plt
 import numpy as np
+from scipy import fft as sp_fft
 from scipy import signal
+import soundfile as sf
+
+try:
+    import numpy_rms
+except ImportError:  # optional SIMD RMS; the einsum fallback below gives the same value
+    numpy_rms = None
+
+try:
+    from numba import njit
+except ImportError:  # optional JIT for the noise-power loop; falls back to numpy
+    njit = None
+
+try:
+    import numexpr
+except ImportError:  # optional fused add+log10+scale; falls back to in-place numpy
+    numexpr = None
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 FONT_PATH = Path(__file__).resolve().parent / "assets" / "fonts" / "SimHei.ttf"
+# ZCR / spectral centroid are computed on audio resampled to this rate (None keeps the input rate).
+FEATURE_SAMPLE_RATE = 16000
+# Waveform plots are reduced to this many min/max buckets (about two per pixel at 12in x 130dpi).
+WAVEFORM_PLOT_BUCKETS = 1600
+# All figures are 12in wide; PNGs are rasterised at PLOT_DPI unless the client reports a narrower
+# plot area, in which case the dpi is lowered so the image matches its on-screen pixel width.
+PLOT_WIDTH_INCHES = 12
+PLOT_DPI = 130
+MIN_PLOT_DPI = 60
+# Peak / mean-abs reductions walk the signal in blocks of this many samples.
+AMPLITUDE_BLOCK_SIZE = 1 << 16
+# Mel spectrogram parameters (librosa.feature.melspectrogram defaults).
+MEL_N_FFT = 2048
+MEL_HOP_LENGTH = 512
+MEL_N_MELS = 128
+# Batched rFFTs over Welch segments / mel frames are split across all cores by pocketfft.
+FFT_WORKERS = -1
 
 if FONT_PATH.exists():
     fm.fontManager.addfont(str(FONT_PATH))
     font_prop = fm.FontProperties(fname=str(FONT_PATH))
-    plt.rcParams["font.sans-serif"] = [font_prop.get_name()]
-    plt.rcParams["axes.unicode_minus"] = False
+    matplotlib.rcParams["font.sans-serif"] = [font_prop.get_name()]
+    matplotlib.rcParams["axes.unicode_minus"] = False
+
+# Figures are reused per thread (requests run concurrently in the FastAPI threadpool).
+_figure_cache = threading.local()
+# Original-side feature work runs here while the request thread handles the enhanced side;
+# the numpy/scipy kernels release the GIL, so the two pipelines overlap.
+_pair_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="analysis")
+
+
+def _map_pair(func, original, enhanced, *args):
+    future = _pair_pool.submit(func, original, *args)
+    enhanced_result = func(enhanced, *args)
+    return future.result(), enhanced_result
+
+
+def _reusable_figure(name: str, figsize: tuple[float, float]) -> Figure:
+    figures = getattr(_figure_cache, "figures", None)
+    if figures is None:
+        figures = _figure_cache.figures = {}
+
+    fig = figures.get(name)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        figures[name] = fig
+    else:
+        fig.clf()
+    return fig
 
 
 def load_audio(file_path: Path, sample_rate: int | None = None) -> tuple[np.ndarray, int]:
-    audio, sr = librosa.load(file_path, sr=sample_rate, mono=True)
+    # Decode straight to float32 with soundfile; librosa.load is only needed for formats
+    # libsndfile cannot read (aac/m4a go through its audioread fallback).
+    try:
+        audio, sr = sf.read(file_path, dtype="float32", always_2d=False)
+    except RuntimeError:
+        import librosa
+
+        return librosa.load(file_path, sr=sample_rate, mono=True)
+
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    if sample_rate is not None and sr != sample_rate:
+        import librosa
+
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate, res_type="polyphase")
+        sr = sample_rate
     return audio, sr
 
 
-def calculate_audio_metrics(
-    original_audio: np.ndarray,
-    enhanced_audio: np.ndarray,
-    sample_rate: int,
-) -> dict[str, float]:
+def _rms(audio: np.ndarray) -> float:
+    if numpy_rms is not None and audio.dtype == np.float32 and audio.size:
+        return float(numpy_rms.rms(audio, window_size=audio.size)[0])
+    # einsum reduces x*x without allocating an x**2 temporary.
+    return float(np.sqrt(np.einsum("i,i->", audio, audio) / audio.size))
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _noise_power(original: np.ndarray, enhanced: np.ndarray) -> float:
+        # Single fused pass over both signals, without materialising original - enhanced.
+        total = 0.0
+        for i in range(original.shape[0]):
+            diff = original[i] - enhanced[i]
+            total += diff * diff
+        return total / original.shape[0]
+
+else:
+
+    def _noise_power(original: np.ndarray, enhanced: np.ndarray) -> float:
+        # |a - b|^2 = a.a - 2 a.b + b.b: three BLAS dots, no difference array. Clamped because
+        # float32 cancellation can leave a tiny negative value when the signals are near-identical.
+        energy = np.dot(original, original) - 2 * np.dot(original, enhanced) + np.dot(enhanced, enhanced)
+        return max(0.0, float(energy)) / original.shape[0]
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _absmax_abssum(audio: np.ndarray) -> tuple[float, float]:
+        # Peak and sum of |x| in one register loop, no abs buffer at all.
+        peak = 0.0
+        total = 0.0
+        for i in range(audio.shape[0]):
+            value = abs(audio[i])
+            total += value
+            if value > peak:
+                peak = value
+        return peak, total
+
+else:
+    _absmax_abssum = None
+
+
+def _amplitude_stats(audio: np.ndarray) -> tuple[float, float, float]:
+    if _absmax_abssum is not None:
+        peak, abs_sum = _absmax_abssum(audio)
+        return _rms(audio), float(peak), float(abs_sum) / audio.size
+
+    # One abs pass feeds both peak and mean; done block-wise into a reused buffer so the
+    # temporary is one block instead of a full-length copy of the signal.
+    block = np.empty(min(audio.size, AMPLITUDE_BLOCK_SIZE), dtype=audio.dtype)
+    peak = 0.0
+    abs_sum = 0.0
+    for start in range(0, audio.size, AMPLITUDE_BLOCK_SIZE):
+        chunk = audio[start : start + AMPLITUDE_BLOCK_SIZE]
+        abs_chunk = np.abs(chunk, out=block[: chunk.size])
+        peak = max(peak, float(abs_chunk.max()))
+        abs_sum += float(abs_chunk.sum(dtype=np.float64))
+    return _rms(audio), peak, abs_sum / audio.size
+
+
+@dataclass
+class AudioPair:
+    """Common-length views of both signals with their amplitude stats, computed once per analysis."""
+
+    sample_rate: int
+    min_len: int
+    original: np.ndarray
+    enhanced: np.ndarray
+    original_rms: float
+    original_peak: float
+    original_mean_abs: float
+    enhanced_rms: float
+    enhanced_peak: float
+    enhanced_mean_abs: float
+
+
+def prepare_audio_pair(original_audio: np.ndarray, enhanced_audio: np.ndarray, sample_rate: int) -> AudioPair:
     min_len = min(len(original_audio), len(enhanced_audio))
-    original = original_audio[:min_len]
-    enhanced = enhanced_audio[:min_len]
-    noise = original - enhanced
-
-    original_rms = float(np.sqrt(np.mean(original**2)))
-    enhanced_rms = float(np.sqrt(np.mean(enhanced**2)))
-    original_peak = float(np.max(np.abs(original)))
-    enhanced_peak = float(np.max(np.abs(enhanced)))
-    noise_power = float(np.mean(noise**2))
-    signal_power = float(np.mean(enhanced**2))
+    original = np.ascontiguousarray(original_audio[:min_len])
+    enhanced = np.ascontiguousarray(enhanced_audio[:min_len])
+    return AudioPair(
+        sample_rate,
+        min_len,
+        original,
+        enhanced,
+        *_amplitude_stats(original),
+        *_amplitude_stats(enhanced),
+    )
+
+
+def _spectral_features(audio: np.ndarray, sample_rate: int) -> tuple[float, float]:
+    import librosa
+
+    # ZCR and spectral centroid are only shown as means, so compute them at a lower rate.
+    feature_sr = sample_rate
+    if FEATURE_SAMPLE_RATE and sample_rate > FEATURE_SAMPLE_RATE:
+        feature_sr = FEATURE_SAMPLE_RATE
+        audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=feature_sr, res_type="polyphase")
+    zcr = float(np.mean(librosa.feature.zero_crossing_rate(audio)))
+    centroid = float(np.mean(librosa.feature.spectral_centroid(y=audio, sr=feature_sr)))
+    return zcr, centroid
+
+
+def calculate_audio_metrics(pair: AudioPair) -> dict[str, float]:
+    original, enhanced, sample_rate = pair.original, pair.enhanced, pair.sample_rate
+    original_rms, original_peak, original_mean_abs = pair.original_rms, pair.original_peak, pair.original_mean_abs
+    enhanced_rms, enhanced_peak, enhanced_mean_abs = pair.enhanced_rms, pair.enhanced_peak, pair.enhanced_mean_abs
+    noise_power = float(_noise_power(original, enhanced))
+    signal_power = enhanced_rms**2
     snr_improvement = 0.0 if noise_power == 0 else float(10 * np.log10(signal_power / noise_power))
 
+    (original_zcr, original_centroid), (enhanced_zcr, enhanced_centroid) = _map_pair(
+        _spectral_features, original, enhanced, sample_rate
+    )
+
     return {
-        "duration": min_len / sample_rate,
+        "duration": pair.min_len / sample_rate,
         "original_rms": original_rms,
         "enhanced_rms": enhanced_rms,
         "original_peak": original_peak,
         "enhanced_peak": enhanced_peak,
-        "original_dynamic_range": float(
-            20 * np.log10(np.max(np.abs(original)) / (np.mean(np.abs(original)) + 1e-10))
-        ),
-        "enhanced_dynamic_range": float(
-            20 * np.log10(np.max(np.abs(enhanced)) / (np.mean(np.abs(enhanced)) + 1e-10))
-        ),
+        "original_dynamic_range": float(20 * np.log10(original_peak / (original_mean_abs + 1e-10))),
+        "enhanced_dynamic_range": float(20 * np.log10(enhanced_peak / (enhanced_mean_abs + 1e-10))),
         "snr_improvement": snr_improvement,
-        "original_zcr": float(np.mean(librosa.feature.zero_crossing_rate(original))),
-        "enhanced_zcr": float(np.mean(librosa.feature.zero_crossing_rate(enhanced))),
-        "original_spectral_centroid": float(
-            np.mean(librosa.feature.spectral_centroid(y=original, sr=sample_rate))
-        ),
-        "enhanced_spectral_centroid": float(
-            np.mean(librosa.feature.spectral_centroid(y=enhanced, sr=sample_rate))
-        ),
+        "original_zcr": original_zcr,
+        "enhanced_zcr": enhanced_zcr,
+        "original_spectral_centroid": original_centroid,
+        "enhanced_spectral_centroid": enhanced_centroid,
     }
 
 
-def build_metrics_rows(
-    original_audio: np.ndarray,
-    enhanced_audio: np.ndarray,
-    sample_rate: int,
-) -> list[dict[str, str]]:
-    metrics = calculate_audio_metrics(original_audio, enhanced_audio, sample_rate)
+def build_metrics_rows(pair: AudioPair) -> list[dict[str, str]]:
+    sample_rate = pair.sample_rate
+    metrics = calculate_audio_metrics(pair)
 
     original_rms = metrics["original_rms"]
     enhanced_rms = metrics["enhanced_rms"]
@@ -205,6 +374,19 @@ def build_metrics_rows(
     ]
 
 
+def _waveform_envelope(audio: np.ndarray, sample_rate: int) -> tuple[np.ndarray, np.ndarray]:
+    # Peak-preserving min/max envelope: one vertical min->max stroke per bucket looks the same
+    # as the full trace at plot resolution, but Agg rasterises a few thousand segments instead of millions.
+    if len(audio) < 4 * WAVEFORM_PLOT_BUCKETS:
+        return np.linspace(0, len(audio) / sample_rate, len(audio)), audio
+
+    starts = np.linspace(0, len(audio), WAVEFORM_PLOT_BUCKETS, endpoint=False).astype(np.int64)
+    envelope = np.empty(2 * WAVEFORM_PLOT_BUCKETS, dtype=audio.dtype)
+    envelope[0::2] = np.minimum.reduceat(audio, starts)
+    envelope[1::2] = np.maximum.reduceat(audio, starts)
+    return np.repeat(starts, 2) / sample_rate, envelope
+
+
 def make_waveform_figure(
     original_audio: np.ndarray,
     enhanced_audio: np.ndarray,
@@ -217,17 +399,18 @@ def make_waveform_figure(
         len(enhanced_audio),
         max(1, int(sample_rate * max_seconds)),
     )
-    time_axis = np.linspace(0, max_samples / sample_rate, max_samples)
-    fig = plt.figure(figsize=(12, 6))
+    original_time, original_trace = _waveform_envelope(original_audio[:max_samples], sample_rate)
+    enhanced_time, enhanced_trace = _waveform_envelope(enhanced_audio[:max_samples], sample_rate)
+    fig = _reusable_figure("waveform", (12, 6))
 
     ax1 = fig.add_subplot(211)
     ax2 = fig.add_subplot(212)
-    ax1.plot(time_axis, original_audio[:max_samples], color="#2563eb", alpha=0.8, linewidth=0.6)
+    ax1.plot(original_time, original_trace, color="#2563eb", alpha=0.8, linewidth=0.6)
     ax1.set_title("混合音频波形", fontsize=12, fontweight="bold")
     ax1.set_ylabel("振幅")
     ax1.grid(True, alpha=0.25)
 
-    ax2.plot(time_axis, enhanced_audio[:max_samples], color="#0f766e", alpha=0.85, linewidth=0.6)
+    ax2.plot(enhanced_time, enhanced_trace, color="#0f766e", alpha=0.85, linewidth=0.6)
     ax2.set_title("分离音频波形", fontsize=12, fontweight="bold")
     ax2.set_xlabel("时间 (秒)")
     ax2.set_ylabel("振幅")
@@ -237,19 +420,53 @@ def make_waveform_figure(
     return fig
 
 
+@lru_cache(maxsize=4)
+def _hann_window(length: int) -> np.ndarray:
+    # Periodic Hann (what get_window("hann") returns), float32 to match the audio; shared, so read-only.
+    window = signal.windows.hann(length, sym=False).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+def _welch_psd(audio: np.ndarray, sample_rate: int, nperseg: int) -> tuple[np.ndarray, np.ndarray]:
+    # Same estimate as signal.welch defaults (periodic Hann, 50% overlap, constant detrend,
+    # one-sided density), but takes |X|^2 as re^2 + im^2 instead of squaring np.abs.
+    window = _hann_window(nperseg)
+    step = nperseg - nperseg // 2
+    frames = np.lib.stride_tricks.sliding_window_view(audio, nperseg)[::step]
+    frames = (frames - frames.mean(axis=1, keepdims=True)) * window
+    spectrum = sp_fft.rfft(frames, axis=1, workers=FFT_WORKERS)
+    psd = (spectrum.real * spectrum.real + spectrum.imag * spectrum.imag).mean(axis=0)
+    psd /= sample_rate * (window * window).sum()
+    if nperseg % 2:
+        psd[1:] *= 2
+    else:
+        psd[1:-1] *= 2
+    return sp_fft.rfftfreq(nperseg, 1 / sample_rate), psd
+
+
+def _power_to_db(power: np.ndarray) -> np.ndarray:
+    # 10*log10(power + 1e-10) without intermediate arrays; the input buffer is consumed.
+    if numexpr is not None:
+        return numexpr.evaluate("10.0 * log10(power + 1e-10)", out=power)
+    power += 1e-10
+    np.log10(power, out=power)
+    power *= 10
+    return power
+
+
 def make_power_spectrum_figure(
     original_audio: np.ndarray,
     enhanced_audio: np.ndarray,
     sample_rate: int,
 ):
     nperseg = min(1024, len(original_audio), len(enhanced_audio))
-    f1, psd1 = signal.welch(original_audio, sample_rate, nperseg=nperseg)
-    f2, psd2 = signal.welch(enhanced_audio, sample_rate, nperseg=nperseg)
+    (f1, psd1), (f2, psd2) = _map_pair(_welch_psd, original_audio, enhanced_audio, sample_rate, nperseg)
 
-    fig = plt.figure(figsize=(12, 5))
+    fig = _reusable_figure("power_spectrum", (12, 5))
     ax = fig.add_subplot(111)
-    ax.semilogx(f1, 10 * np.log10(psd1 + 1e-10), color="#2563eb", alpha=0.8, label="混合音频")
-    ax.semilogx(f2, 10 * np.log10(psd2 + 1e-10), color="#0f766e", alpha=0.85, label="分离音频")
+    ax.semilogx(f1, _power_to_db(psd1), color="#2563eb", alpha=0.8, label="混合音频")
+    ax.semilogx(f2, _power_to_db(psd2), color="#0f766e", alpha=0.85, label="分离音频")
     ax.set_title("功率谱密度对比", fontsize=12, fontweight="bold")
     ax.set_xlabel("频率 (Hz)")
     ax.set_ylabel("功率谱密度 (dB/Hz)")
@@ -259,17 +476,39 @@ def make_power_spectrum_figure(
     return fig
 
 
+@lru_cache(maxsize=8)
+def _mel_filterbank(sample_rate: int) -> np.ndarray:
+    import librosa
+
+    mel_fb = librosa.filters.mel(sr=sample_rate, n_fft=MEL_N_FFT, n_mels=MEL_N_MELS, dtype=np.float32)
+    mel_fb.setflags(write=False)
+    return mel_fb
+
+
+def _mel_power(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    # librosa.feature.melspectrogram defaults (centered zero padding, Hann, power=2) with one
+    # rFFT pass, |X|^2 as re^2 + im^2 and a filterbank cached per sample rate.
+    window = _hann_window(MEL_N_FFT)
+    mel_fb = _mel_filterbank(sample_rate)
+    padded = np.pad(audio, MEL_N_FFT // 2)
+    frames = np.lib.stride_tricks.sliding_window_view(padded, MEL_N_FFT)[::MEL_HOP_LENGTH] * window
+    spectrum = sp_fft.rfft(frames, axis=1, workers=FFT_WORKERS)
+    power = spectrum.real * spectrum.real + spectrum.imag * spectrum.imag
+    return mel_fb @ power.T
+
+
 def make_mel_spectrum_figure(
     original_audio: np.ndarray,
     enhanced_audio: np.ndarray,
     sample_rate: int,
 ):
-    mel1 = librosa.feature.melspectrogram(y=original_audio, sr=sample_rate)
-    mel2 = librosa.feature.melspectrogram(y=enhanced_audio, sr=sample_rate)
+    import librosa
+
+    mel1, mel2 = _map_pair(_mel_power, original_audio, enhanced_audio, sample_rate)
     mel1_db = librosa.power_to_db(mel1, ref=np.max)
     mel2_db = librosa.power_to_db(mel2, ref=np.max)
 
-    fig = plt.figure(figsize=(12, 7))
+    fig = _reusable_figure("mel_spectrum", (12, 7))
     ax1 = fig.add_subplot(211)
     ax2 = fig.add_subplot(212)
 
@@ -298,10 +537,17 @@ def make_mel_spectrum_figure(
     return fig
 
 
-def figure_to_data_uri(fig) -> str:
+def plot_dpi(plot_width: int | None) -> int:
+    if not plot_width or plot_width <= 0:
+        return PLOT_DPI
+    return max(MIN_PLOT_DPI, min(PLOT_DPI, round(plot_width / PLOT_WIDTH_INCHES)))
+
+
+def figure_to_data_uri(fig, dpi: int = PLOT_DPI) -> str:
     buffer = BytesIO()
-    fig.savefig(buffer, format="png", dpi=130, bbox_inches="tight")
-    plt.close(fig)
+    # Figures are already tight_layout'ed, so skip bbox_inches="tight" (it renders the figure
+    # twice) and use fast zlib settings: PNG encoding dominated the plot time.
+    fig.savefig(buffer, format="png", dpi=dpi, pil_kwargs={"compress_level": 1})
     encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
     return f"data:image/png;base64,{encoded}"
 
@@ -310,10 +556,13 @@ def build_analysis_payload(
     original_path: Path,
     enhanced_path: Path,
     max_seconds: float,
+    plot_width: int | None = None,
 ) -> dict[str, object]:
+    dpi = plot_dpi(plot_width)
     original_audio, sample_rate = load_audio(original_path)
     enhanced_audio, _ = load_audio(enhanced_path, sample_rate=sample_rate)
-    metrics_rows = build_metrics_rows(original_audio, enhanced_audio, sample_rate)
+    pair = prepare_audio_pair(original_audio, enhanced_audio, sample_rate)
+    metrics_rows = build_metrics_rows(pair)
 
     return {
         "sample_rate": sample_rate,
@@ -325,12 +574,13 @@ def build_analysis_payload(
                 enhanced_audio,
                 sample_rate,
                 max_seconds=max_seconds,
-            )
+            ),
+            dpi,
         ),
         "power_spectrum_image": figure_to_data_uri(
-            make_power_spectrum_figure(original_audio, enhanced_audio, sample_rate)
+            make_power_spectrum_figure(original_audio, enhanced_audio, sample_rate), dpi
         ),
         "mel_spectrum_image": figure_to_data_uri(
-            make_mel_spectrum_figure(original_audio, enhanced_audio, sample_rate)
+            make_mel_spectrum_figure(original_audio, enhanced_audio, sample_rate), dpi
         ),
     }
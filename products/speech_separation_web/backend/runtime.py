@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import gc
 import hashlib
 import re
 import sys
@@ -32,6 +33,7 @@ class SeparationResult:
     model_ready_seconds: float
     process_seconds: float
     total_seconds: float
+    model_cache_hit: bool = False
 
 
 def bootstrap_project_paths(project_root: Path) -> None:
@@ -54,6 +56,13 @@ def load_mossformer2_ss(project_root: Path) -> ModelHandle:
     )
 
 
+def free_model_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
 def model_checkpoint_dir(project_root: Path) -> Path:
     return MODEL_ROOT / MODEL_NAME
 
@@ -146,6 +155,7 @@ def separate_audio_file(
     output_path: Path,
     model_ready_seconds: float,
     total_start_time: float,
+    model_cache_hit: bool = False,
 ) -> SeparationResult:
     process_start = time.perf_counter()
     output_wav = model_handle.clearvoice(
@@ -168,6 +178,7 @@ def separate_audio_file(
         model_ready_seconds=model_ready_seconds,
         process_seconds=process_seconds,
         total_seconds=time.perf_counter() - total_start_time,
+        model_cache_hit=model_cache_hit,
     )
 
 
@@ -5,6 +5,10 @@ const state = {
   modelAvailable: false,
   activeTab: "waveform",
   logs: [],
+  pendingLogs: [],
+  logFlushScheduled: false,
+  logSecond: -1,
+  logTimestamp: "",
 };
 
 const el = {};
@@ -32,6 +36,7 @@ function bindElements() {
     "enhanceButtonText",
     "busySpinner",
     "resetButton",
+    "releaseModelButton",
     "statusMessage",
     "resultStamp",
     "inputName",
@@ -71,20 +76,55 @@ function setStatus(text, isError = false) {
   el.statusMessage.style.color = isError ? "var(--danger)" : "var(--muted)";
 }
 
-function appendLog(message) {
-  const timestamp = new Date().toLocaleTimeString("zh-CN", { hour12: false });
-  state.logs.push(`[${timestamp}] ${message}`);
-  state.logs = state.logs.slice(-80);
-  el.logList.replaceChildren();
-  state.logs.forEach((line) => {
+const MAX_LOG_LINES = 80;
+const LOG_TIME_FORMAT = new Intl.DateTimeFormat("zh-CN", {
+  hour: "2-digit",
+  minute: "2-digit",
+  second: "2-digit",
+  hour12: false,
+});
+
+function flushLogs() {
+  // Lines logged within one frame are appended together, with a single layout and scroll.
+  const fragment = document.createDocumentFragment();
+  state.pendingLogs.forEach((line) => {
     const item = document.createElement("li");
     item.textContent = line;
-    el.logList.appendChild(item);
+    fragment.appendChild(item);
   });
+  state.pendingLogs = [];
+  state.logFlushScheduled = false;
+  el.logList.appendChild(fragment);
+  while (el.logList.childElementCount > MAX_LOG_LINES) {
+    el.logList.firstElementChild.remove();
+  }
   el.logCount.textContent = String(state.logs.length);
   el.logList.scrollTop = el.logList.scrollHeight;
 }
 
+function logTimestamp() {
+  // toLocaleTimeString builds a new locale formatter per call; reuse one and format once per second.
+  const second = Math.floor(Date.now() / 1000);
+  if (second !== state.logSecond) {
+    state.logSecond = second;
+    state.logTimestamp = LOG_TIME_FORMAT.format(second * 1000);
+  }
+  return state.logTimestamp;
+}
+
+function appendLog(message) {
+  const line = `[${logTimestamp()}] ${message}`;
+  state.logs.push(line);
+  if (state.logs.length > MAX_LOG_LINES) {
+    state.logs.shift();
+  }
+  state.pendingLogs.push(line);
+  if (!state.logFlushScheduled) {
+    state.logFlushScheduled = true;
+    window.requestAnimationFrame(flushLogs);
+  }
+}
+
 async function apiJson(url, options = {}) {
   const response = await fetch(url, options);
   const contentType = response.headers.get("content-type") || "";
@@ -121,6 +161,7 @@ function setBusy(isBusy) {
   el.sampleSourceButton.disabled = isBusy;
   el.uploadSourceButton.disabled = isBusy;
   el.resetButton.disabled = isBusy;
+  el.releaseModelButton.disabled = isBusy;
   updateEnhanceButton();
 }
 
@@ -340,12 +381,20 @@ async function loadSamples() {
   updateEnhanceButton();
 }
 
+
+function plotPixelWidth() {
+  // Analysis images are rasterised at the plot area's device-pixel width instead of being downscaled.
+  const width = byId("waveformPanel").parentElement.clientWidth;
+  return Math.round(width * (window.devicePixelRatio || 1));
+}
+
 async function runEnhancement() {
   resetResult(false);
   const formData = new FormData();
   formData.append("source_type", state.source);
   formData.append("output_dir", el.outputDir.value);
   formData.append("waveform_seconds", el.waveformSeconds.value);
+  formData.append("plot_width", String(plotPixelWidth()));
 
   if (state.source === "sample") {
     const sample = selectedSample();
@@ -385,6 +434,21 @@ async function runEnhancement() {
   }
 }
 
+async function releaseModel() {
+  el.releaseModelButton.disabled = true;
+  try {
+    const payload = await apiJson("/api/model/release", { method: "POST" });
+    const message = payload.released ? "已释放模型，下次分离会重新加载" : "模型尚未加载";
+    appendLog(message);
+    setStatus(message);
+  } catch (error) {
+    appendLog(`释放模型失败: ${error.message}`);
+    setStatus(error.message, true);
+  } finally {
+    el.releaseModelButton.disabled = state.busy;
+  }
+}
+
 function bindEvents() {
   el.sampleSourceButton.addEventListener("click", () => setSource("sample"));
   el.uploadSourceButton.addEventListener("click", () => setSource("upload"));
@@ -402,6 +466,7 @@ function bindEvents() {
     el.waveformSecondsText.textContent = `${el.waveformSeconds.value} 秒`;
   });
   el.enhanceButton.addEventListener("click", runEnhancement);
+  el.releaseModelButton.addEventListener("click", releaseModel);
   el.resetButton.addEventListener("click", () => {
     resetResult(true);
     updateInputPreview();
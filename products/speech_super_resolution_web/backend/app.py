@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from pathlib import Path
+import importlib
 import threading
 import time
 import uuid
@@ -10,13 +12,13 @@ from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from .analysis import build_analysis_payload
 from .runtime import (
     AUDIO_EXTENSIONS,
     DEFAULT_OUTPUT_DIR,
     ModelHandle,
     SuperResolutionResult,
     audio_mime_type,
+    free_model_memory,
     list_sample_audio,
     load_mossformer2_sr,
     make_output_path,
@@ -47,7 +49,28 @@ class JobRecord:
     analysis: dict[str, object]
 
 
-app = FastAPI(title="LightClear Speech Super Resolution Web", version="1.0.0")
+def preload_model_handle() -> None:
+    if model_is_available(PROJECT_ROOT):
+        try:
+            get_model_handle()
+        except Exception:
+            # Leave the handle empty; the first request retries the load and reports the error.
+            pass
+    # Warm the plotting stack too, off the startup path and whether or not the weights are present,
+    # so the first analysis does not pay for it.
+    importlib.import_module(f"{__package__}.analysis")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Load the model once, in the background, while the user picks audio; every request then
+    # reuses the same resident handle.
+    threading.Thread(target=preload_model_handle, name="model-preload", daemon=True).start()
+    yield
+    release_model_handle()
+
+
+app = FastAPI(title="LightClear Speech Super Resolution Web", version="1.0.0", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 
 _model_handle: ModelHandle | None = None
@@ -65,12 +88,29 @@ def project_relative(path: Path) -> str:
         return str(resolved_path)
 
 
-def get_model_handle() -> ModelHandle:
+def get_model_handle() -> tuple[ModelHandle, bool]:
     global _model_handle
-    with _model_lock:
+    # Only a handle that was ready without waiting is a hit; blocking behind the preload thread is not.
+    waited = not _model_lock.acquire(blocking=False)
+    if waited:
+        _model_lock.acquire()
+    try:
+        cache_hit = not waited and _model_handle is not None
         if _model_handle is None:
             _model_handle = load_mossformer2_sr(PROJECT_ROOT)
-        return _model_handle
+        return _model_handle, cache_hit
+    finally:
+        _model_lock.release()
+
+
+def release_model_handle() -> bool:
+    global _model_handle
+    with _inference_lock, _model_lock:
+        released = _model_handle is not None
+        _model_handle = None
+    if released:
+        free_model_memory()
+    return released
 
 
 def resolve_sample_path(sample_path: str | None) -> Path:
@@ -131,12 +171,17 @@ def build_result_payload(record: JobRecord) -> dict[str, object]:
             "model_ready_seconds": result.model_ready_seconds,
             "process_seconds": result.process_seconds,
             "total_seconds": result.total_seconds,
+            "model_cache_hit": result.model_cache_hit,
         },
         "analysis": record.analysis,
         "logs": [
             f"输入: {project_relative(result.input_path)}",
             f"超分输出: {project_relative(result.output_path)}",
-            f"模型准备: {result.model_ready_seconds:.2f} 秒",
+            (
+                "模型准备: 复用已加载模型"
+                if result.model_cache_hit
+                else f"模型准备: {result.model_ready_seconds:.2f} 秒"
+            ),
             f"音频处理: {result.process_seconds:.2f} 秒",
             f"总执行: {result.total_seconds:.2f} 秒",
         ],
@@ -162,6 +207,7 @@ def health() -> dict[str, object]:
         "model_name": "MossFormer2_SR_48K",
         "task": "speech_super_resolution",
         "model_available": model_is_available(PROJECT_ROOT),
+        "model_loaded": _model_handle is not None,
         "checkpoint_dir": project_relative(checkpoint_dir),
         "sample_count": len(samples),
         "default_output_dir": DEFAULT_OUTPUT_DIR,
@@ -195,6 +241,7 @@ async def super_resolve(
     sample_path: str | None = Form(default=None),
     output_dir: str = Form(default=DEFAULT_OUTPUT_DIR),
     waveform_seconds: float = Form(default=8.0),
+    plot_width: int | None = Form(default=None),
     file: UploadFile | None = File(default=None),
 ) -> dict[str, object]:
     total_start = time.perf_counter()
@@ -227,7 +274,7 @@ async def super_resolve(
 
     try:
         model_ready_start = time.perf_counter()
-        model_handle = get_model_handle()
+        model_handle, model_cache_hit = get_model_handle()
         model_ready_seconds = time.perf_counter() - model_ready_start
 
         with _inference_lock:
@@ -237,15 +284,24 @@ async def super_resolve(
                 output_path=output_path,
                 model_ready_seconds=model_ready_seconds,
                 total_start_time=total_start,
+                model_cache_hit=model_cache_hit,
             )
 
-        analysis = build_analysis_payload(result.input_path, result.output_path, waveform_window)
+        # matplotlib/scipy/numba are imported on first use rather than at server start
+        from .analysis import build_analysis_payload
+
+        analysis = build_analysis_payload(result.input_path, result.output_path, waveform_window, plot_width)
         record = store_job(result, analysis)
         return build_result_payload(record)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"处理失败: {exc}") from exc
 
 
+@app.post("/api/model/release")
+def release_model() -> dict[str, object]:
+    return {"released": release_model_handle()}
+
+
 @app.get("/api/jobs/{job_id}/audio/{variant}")
 def job_audio(job_id: str, variant: str) -> FileResponse:
     record = get_job(job_id)
@@ -0,0 +1,7 @@
+from pathlib import Path
+import sys
+
+# Import the vendored clearvoice package from a plain checkout (it is installed from third_party/).
+THIRD_PARTY_DIR = Path(__file__).resolve().parents[1] / "third_party"
+if str(THIRD_PARTY_DIR) not in sys.path:
+    sys.path.insert(0, str(THIRD_PARTY_DIR))
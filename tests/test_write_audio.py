@@ -0,0 +1,41 @@
+from argparse import Namespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+networks = pytest.importorskip("clearvoice.networks")
+
+
+def make_speech_model(ext, sample_width):
+    # write_audio only reads args and the probed input format, so skip model loading.
+    model = networks.SpeechModel.__new__(networks.SpeechModel)
+    model.args = Namespace(sampling_rate=48000)
+    model.data = {"sample_rate": 48000, "channels": 1, "sample_width": sample_width, "ext": ext}
+    return model
+
+
+def test_write_audio_24bit_flac_round_trip(tmp_path):
+    # pydub reports 24-bit sources as sample width 4, which FLAC cannot store as PCM_32.
+    output_path = tmp_path / "out.flac"
+    t = np.arange(48000) / 48000
+    audio = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+
+    make_speech_model("flac", 4).write_audio(str(output_path), audio=audio[None, :])
+
+    info = sf.info(str(output_path))
+    assert info.format == "FLAC"
+    assert info.subtype == "PCM_24"
+    assert info.samplerate == 48000
+    assert info.frames == len(audio)
+    data, _ = sf.read(str(output_path), dtype="float64")
+    np.testing.assert_allclose(data, audio, atol=2.0 ** -22)
+
+
+def test_write_audio_32bit_wav_keeps_pcm_32(tmp_path):
+    output_path = tmp_path / "out.wav"
+    audio = np.linspace(-0.5, 0.5, 4800)
+
+    make_speech_model("wav", 4).write_audio(str(output_path), audio=audio[None, :])
+
+    assert sf.info(str(output_path)).subtype == "PCM_32"
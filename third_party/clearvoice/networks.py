@@ -18,6 +18,7 @@ import torch.backends.mps as mps
 import soundfile as sf
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import librosa
 from tqdm import tqdm
 import numpy as np
@@ -27,6 +28,12 @@ from .utils.decode_batch import decode_one_audio_batch
 from .dataloader.dataloader import DataReader
 
 MAX_WAV_VALUE = 32768.0
+# Number of frames converted and written per block when streaming PCM output
+WRITE_BLOCK_SIZE = 65536
+# Python-side buffer for the output file, so libsndfile's small writes are batched
+WRITE_BUFFER_SIZE = 1 << 20
+# Seconds to wait for nvidia-smi when picking the GPU with the most free memory
+NVIDIA_SMI_TIMEOUT = 10
 
 class SpeechModel:
     """
@@ -92,9 +99,13 @@ class SpeechModel:
         Returns:
         int: Index of the GPU with the most free memory, or None if no GPU is found or an error occurs.
         """
+        # With a single visible GPU there is nothing to choose, so skip spawning nvidia-smi at load time
+        if torch.cuda.device_count() == 1:
+            return 0
         try:
-            # Run nvidia-smi to query GPU memory usage and free memory
-            result = subprocess.run(['nvidia-smi', '--query-gpu=memory.used,memory.free', '--format=csv,nounits,noheader'], stdout=subprocess.PIPE)
+            # Run nvidia-smi to query GPU memory usage and free memory (bounded, a wedged driver can hang it)
+            result = subprocess.run(['nvidia-smi', '--query-gpu=memory.used,memory.free', '--format=csv,nounits,noheader'],
+                                    stdout=subprocess.PIPE, timeout=NVIDIA_SMI_TIMEOUT)
             gpu_info = result.stdout.decode('utf-8').strip().split('\n')
 
             free_gpu = None
@@ -163,6 +174,20 @@ class SpeechModel:
             self._load_model(self.model, checkpoint_path, model_key='model')
 
     def _load_model(self, model, checkpoint_path, model_key=None):
+        # A slim copy of the already-remapped state dict is kept next to the checkpoint; it skips the
+        # optimizer/training entries and the key matching below, and is memory-mapped where supported.
+        state_cache_path = f'{checkpoint_path}.{model_key or "model"}.state.pt'
+        if os.path.isfile(state_cache_path) and os.path.getmtime(state_cache_path) >= os.path.getmtime(checkpoint_path):
+            try:
+                try:
+                    state = torch.load(state_cache_path, map_location='cpu', mmap=True, weights_only=True)
+                except TypeError:  # torch < 2.1 has no mmap/weights_only
+                    state = torch.load(state_cache_path, map_location='cpu')
+                model.load_state_dict(state)
+                return
+            except Exception as e:
+                print(f'Ignoring weights cache {state_cache_path}: {e}')
+
         # Load the checkpoint file into memory (map_location ensures compatibility with different devices)
         checkpoint = torch.load(checkpoint_path, map_location=lambda storage, loc: storage)
         # Load the model's state dictionary (weights and biases) into the current model
@@ -181,6 +206,13 @@ class SpeechModel:
             elif self.print: print(f'{key} not loaded')
         model.load_state_dict(state)
 
+        try:
+            tmp_path = state_cache_path + '.tmp'
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, state_cache_path)
+        except OSError:
+            pass  # read-only checkpoint dir: keep loading the full checkpoint
+
     def decode(self):
         """
         Decodes the input audio data using the loaded model and ensures the output matches the original audio length.
@@ -232,7 +264,8 @@ class SpeechModel:
                   If multi-speaker audio is processed, a list of truncated audio outputs per speaker is returned.
         """
         # Decode the audio using the loaded model on the given device (e.g., CPU or GPU)
-        output_audio = decode_one_audio_batch(self.model, self.device, input_data, self.args)
+        with torch.inference_mode():
+            output_audio = decode_one_audio_batch(self.model, self.device, input_data, self.args)
         return output_audio
        
     def process(self, input_path, online_write=False, output_path=None):
@@ -258,10 +291,16 @@ class SpeechModel:
 
 
         # Check if online writing is enabled
+        output_file_path = None
         if online_write:
             output_wave_dir = self.args.output_dir  # Set the default output directory
             if isinstance(output_path, str):  # If a specific output path is provided, use it
-                output_wave_dir = os.path.join(output_path, self.name)
+                if os.path.isfile(input_path) and os.path.splitext(output_path)[1] and not os.path.isdir(output_path):
+                    # A single input file with an output file path: write the result straight to that file
+                    output_file_path = output_path
+                    output_wave_dir = os.path.dirname(output_path) or '.'
+                else:
+                    output_wave_dir = os.path.join(output_path, self.name)
             # Create the output directory if it does not exist
             if not os.path.isdir(output_wave_dir):
                 os.makedirs(output_wave_dir)
@@ -274,12 +313,16 @@ class SpeechModel:
             assert online_write == True
             process_tse(self.args, self.model, self.device, data_reader, output_wave_dir)
         else:
-            # Disable gradient calculation for better efficiency during inference
-            with torch.no_grad():
+            # Disable autograd (including version counter tracking) for better efficiency during inference.
+            # The next audio file is read on a background thread while the current one is decoded.
+            with torch.inference_mode(), ThreadPoolExecutor(max_workers=1) as prefetcher:
+                next_item = prefetcher.submit(data_reader.__getitem__, 0) if num_samples > 0 else None
                 for idx in tqdm(range(num_samples)):  # Loop over all audio samples
                     self.data = {}
                     # Read the audio, waveform ID, and audio length from the data reader
-                    input_audio, wav_id, input_len, scalars, audio_info = data_reader[idx]
+                    input_audio, wav_id, input_len, scalars, audio_info = next_item.result()
+                    if idx + 1 < num_samples:
+                        next_item = prefetcher.submit(data_reader.__getitem__, idx + 1)
                     # Store the input audio and metadata in self.data
                     self.data['audio'] = input_audio
                     self.data['id'] = wav_id
@@ -306,7 +349,7 @@ class SpeechModel:
                                 self.write_audio(output_file, key=None, spk=spk, audio=output_audios)
                         else:
                             # Single-speaker or standard output
-                            output_file = os.path.join(output_wave_dir, wav_id)
+                            output_file = output_file_path or os.path.join(output_wave_dir, wav_id)
                             self.write_audio(output_file, key=None, spk=None, audio=output_audios)
                     else:
                         # If not writing to disk, store the output in the result dictionary
@@ -357,9 +400,8 @@ class SpeechModel:
                 result = librosa.resample(result_[0,:], orig_sr=self.args.sampling_rate, target_sr=self.data['sample_rate'])
         else:
             if self.data['channels'] == 2:
-                left_channel = result_[0,:]
-                right_channel = result_[1,:]
-                result = np.vstack((left_channel, right_channel)).T
+                # (frames, 2) view of the decoded channels; the block loop below copies as it converts
+                result = result_[:2, :].T
             else:
                 result = result_[0,:]
                 
@@ -373,9 +415,40 @@ class SpeechModel:
             self.data['sample_width'] = 2 ##16 bit int
             MAX_WAV_VALUE = 32768.0
             np_type = np.int16
+
+        if self.data['ext'] in ['wav', 'flac']:
+            # Stream PCM frames to disk block by block instead of building the
+            # whole integer copy and a pydub segment in memory
+            file_format = self.data['ext'].upper()
+            subtype = 'PCM_32' if np_type == np.int32 else 'PCM_16'
+            if not sf.check_format(file_format, subtype):
+                # FLAC has no 32-bit PCM (pydub reports 24-bit sources as width 4); libsndfile
+                # scales the int32 blocks down to 24 bits
+                subtype = 'PCM_24'
+            # Scale/clip/cast into two reused block buffers, and give libsndfile a buffered file
+            # object so its many small writes are coalesced into WRITE_BUFFER_SIZE syscalls
+            float_buf = np.empty((WRITE_BLOCK_SIZE,) + result.shape[1:], dtype=np.float64)
+            int_buf = np.empty(float_buf.shape, dtype=np_type)
+            with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as raw, \
+                    sf.SoundFile(raw, mode='w', samplerate=self.data['sample_rate'],
+                                 channels=self.data['channels'], subtype=subtype,
+                                 format=file_format) as f:
+                for start in range(0, result.shape[0], WRITE_BLOCK_SIZE):
+                    chunk = result[start:start + WRITE_BLOCK_SIZE]
+                    scaled = np.multiply(chunk, MAX_WAV_VALUE, out=float_buf[:len(chunk)])
+                    np.clip(scaled, -MAX_WAV_VALUE, MAX_WAV_VALUE - 1, out=scaled)
+                    block = int_buf[:len(chunk)]
+                    np.copyto(block, scaled, casting='unsafe')
+                    f.write(block)
+            return
                         
-        result = result * MAX_WAV_VALUE
-        result = result.astype(np_type)
+        # Clip before the integer cast so peaks above full scale saturate instead of wrapping around;
+        # scale and clip share one float buffer, which is then cast into a presized integer array
+        scaled = np.multiply(result, MAX_WAV_VALUE)
+        np.clip(scaled, -MAX_WAV_VALUE, MAX_WAV_VALUE - 1, out=scaled)
+        result = np.empty(scaled.shape, dtype=np_type)
+        np.copyto(result, scaled, casting='unsafe')
+        del scaled
         audio_segment = AudioSegment(
             result.tobytes(),  # Raw audio data as bytes
             frame_rate=self.data['sample_rate'],  # Sample rate
@@ -10,6 +10,7 @@ import torch.nn as nn
 import numpy as np
 import os 
 import sys
+import threading
 import librosa
 import torchaudio
 from .misc import power_compress, power_uncompress, stft, istft, compute_fbank
@@ -18,6 +19,35 @@ from ..dataloader.meldataset import mel_spectrogram
 
 # Constant for normalizing audio values
 MAX_WAV_VALUE = 32768.0
+# Autocast dtypes selectable through args.precision; anything else runs in fp32
+AUTOCAST_DTYPES = {'bf16': torch.bfloat16, 'fp16': torch.float16}
+
+# Per-thread pinned host buffers for CUDA uploads, keyed by device and grown as needed
+_pinned_staging = threading.local()
+
+def to_device_tensor(inputs, device):
+    """Converts a numpy array to a float32 tensor on `device`, staging CUDA uploads through a reused pinned buffer."""
+    tensor = torch.from_numpy(np.asarray(inputs, dtype=np.float32))
+    if device.type != 'cuda':
+        return tensor
+    buffers = getattr(_pinned_staging, 'buffers', None)
+    if buffers is None:
+        buffers = _pinned_staging.buffers = {}
+    buffer, copied = buffers.get(device, (None, None))
+    if buffer is None or buffer.numel() < tensor.numel():
+        # Pinning is a page-locking host allocation, so pay for it once per size step, not per upload
+        buffer = torch.empty(tensor.numel(), dtype=torch.float32, pin_memory=True)
+    elif copied is not None:
+        # The previous async copy may still be reading the buffer
+        copied.synchronize()
+    staging = buffer[:tensor.numel()].view(tensor.shape)
+    staging.copy_(tensor)
+    # A pinned source lets the copy run as one async DMA instead of through pageable staging buffers
+    output = staging.to(device, non_blocking=True)
+    copied = torch.cuda.Event()
+    copied.record(torch.cuda.current_stream(device))
+    buffers[device] = (buffer, copied)
+    return output
 
 def decode_one_audio(model, device, inputs, args):
     """Decodes audio using the specified model based on the provided network type.
@@ -329,6 +359,7 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
         device (torch.device): The device (CPU or GPU) for computation.
         inputs (torch.Tensor): Input audio tensor of shape (B, T), where B is the batch size and T is the number of time steps.
         args (Namespace): Contains arguments for sampling rate, window size, and other parameters.
+                          An optional ``precision`` ('fp32', 'bf16' or 'fp16') selects autocast for the model forward.
 
     Returns:
         numpy.ndarray: The decoded audio output, normalized to the range [-1, 1].
@@ -336,6 +367,10 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
     inputs = inputs[0, :]  # Extract the first element from the input tensor
     input_len = inputs.shape[0]  # Get the length of the input audio
     inputs = inputs * MAX_WAV_VALUE  # Normalize the input to the maximum WAV value
+    # Only the mask network runs under autocast; fbank, STFT and iSTFT stay in fp32
+    autocast_dtype = AUTOCAST_DTYPES.get(getattr(args, 'precision', 'fp32'))
+    # Run the fbank/STFT/iSTFT front-end on the GPU next to the model instead of on one CPU core
+    feature_device = device if device.type == 'cuda' else torch.device('cpu')
 
     # Check if input length exceeds the defined threshold for online decoding
     if input_len > args.sampling_rate * args.one_time_decode_length:  # 20 seconds
@@ -356,9 +391,10 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
                     padding = t - (t - window) // stride * stride
                     inputs = np.concatenate([inputs, np.zeros(padding)], 0)
 
-            audio = torch.from_numpy(inputs).type(torch.FloatTensor)  # Convert to Torch tensor
+            audio = to_device_tensor(inputs, feature_device)  # Convert to Torch tensor
             t = audio.shape[0]  # Update length after conversion
-            outputs = torch.from_numpy(np.zeros(t))  # Initialize output tensor
+            # Initialize output tensor on the feature device so segments are stitched without per-window host copies
+            outputs = torch.zeros(t, dtype=torch.float64, device=feature_device)
             give_up_length = (window - stride) // 2  # Determine length to ignore at the edges
             dfsmn_memory_length = 0  # Placeholder for potential memory length
             current_idx = 0  # Initialize current index for sliding window
@@ -387,14 +423,15 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
                 fbanks = torch.cat([fbanks, fbank_delta, fbank_delta_delta], dim=1)
                 fbanks = fbanks.unsqueeze(0).to(device)  # Add batch dimension and move to device
 
-                # Pass filter banks through the model
-                Out_List = model(fbanks)
-                pred_mask = Out_List[-1]  # Get the predicted mask from the output
+                # Pass filter banks through the model (optionally in reduced precision)
+                with torch.autocast(device.type, dtype=autocast_dtype or torch.bfloat16, enabled=autocast_dtype is not None):
+                    Out_List = model(fbanks)
+                pred_mask = Out_List[-1].float()  # Get the predicted mask from the output
 
                 # Apply STFT to the audio segment
                 spectrum = stft(audio_segment, args)
                 pred_mask = pred_mask.permute(2, 1, 0)  # Permute dimensions for masking
-                masked_spec = spectrum.cpu() * pred_mask.detach().cpu()  # Apply mask to the spectrum
+                masked_spec = spectrum * pred_mask.detach().to(feature_device)  # Apply mask to the spectrum
                 masked_spec_complex = masked_spec[:, :, 0] + 1j * masked_spec[:, :, 1]  # Convert to complex form
 
                 # Reconstruct audio from the masked spectrogram
@@ -411,7 +448,7 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
 
     else:
         # Process the entire audio at once if it is shorter than the threshold
-        audio = torch.from_numpy(inputs).type(torch.FloatTensor)
+        audio = to_device_tensor(inputs, feature_device)
         fbanks = compute_fbank(audio.unsqueeze(0), args)
 
         # Compute deltas for filter banks
@@ -425,18 +462,19 @@ def decode_one_audio_mossformer2_se_48k(model, device, inputs, args):
         fbanks = torch.cat([fbanks, fbank_delta, fbank_delta_delta], dim=1)
         fbanks = fbanks.unsqueeze(0).to(device)  # Add batch dimension and move to device
 
-        # Pass filter banks through the model
-        Out_List = model(fbanks)
-        pred_mask = Out_List[-1]  # Get the predicted mask
+        # Pass filter banks through the model (optionally in reduced precision)
+        with torch.autocast(device.type, dtype=autocast_dtype or torch.bfloat16, enabled=autocast_dtype is not None):
+            Out_List = model(fbanks)
+        pred_mask = Out_List[-1].float()  # Get the predicted mask
         spectrum = stft(audio, args)  # Apply STFT to the audio
         pred_mask = pred_mask.permute(2, 1, 0)  # Permute dimensions for masking
-        masked_spec = spectrum * pred_mask.detach().cpu()  # Apply mask to the spectrum
+        masked_spec = spectrum * pred_mask.detach().to(feature_device)  # Apply mask to the spectrum
         masked_spec_complex = masked_spec[:, :, 0] + 1j * masked_spec[:, :, 1]  # Convert to complex form
         
         # Reconstruct audio from the masked spectrogram
         outputs = istft(masked_spec_complex, args, len(audio))
 
-    return outputs.numpy() / MAX_WAV_VALUE  # Return the output normalized to [-1, 1]
+    return outputs.cpu().numpy() / MAX_WAV_VALUE  # Return the output normalized to [-1, 1]
 
 def get_mel(x, args):
     """
@@ -477,6 +515,9 @@ def decode_one_audio_mossformer2_sr_48k(model, device, inputs, args):
     inputs = inputs[0, :]  # Extract the first element from the input tensor
     input_len = inputs.shape[0]  # Get the length of the input audio
     #inputs = inputs * MAX_WAV_VALUE  # Normalize the input to the maximum WAV value
+    # Keep the waveform and mel front-end next to the model on the GPU, as the SE 48k decoder does
+    device = torch.device(device)
+    feature_device = device if device.type == 'cuda' else torch.device('cpu')
 
     # Check if input length exceeds the defined threshold for online decoding
     if input_len > args.sampling_rate * args.one_time_decode_length:  # 20 seconds
@@ -497,9 +538,10 @@ def decode_one_audio_mossformer2_sr_48k(model, device, inputs, args):
                     padding = t - (t - window) // stride * stride
                     inputs = np.concatenate([inputs, np.zeros(padding)], 0)
 
-            audio = torch.from_numpy(inputs).type(torch.FloatTensor)  # Convert to Torch tensor
+            audio = to_device_tensor(inputs, feature_device)  # Convert to Torch tensor
             t = audio.shape[0]  # Update length after conversion
-            outputs = torch.from_numpy(np.zeros(t))  # Initialize output tensor
+            # Initialize output tensor on the feature device so segments are stitched without per-window host copies
+            outputs = torch.zeros(t, dtype=torch.float64, device=feature_device)
             give_up_length = (window - stride) // 2  # Determine length to ignore at the edges
             dfsmn_memory_length = 0  # Placeholder for potential memory length
             current_idx = 0  # Initialize current index for sliding window
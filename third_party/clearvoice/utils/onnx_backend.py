@@ -0,0 +1,97 @@
+#!/usr/bin/env python -u
+# -*- coding: utf-8 -*-
+
+import os
+import torch
+
+
+def export_onnx(model, onnx_path, num_mels, opset=17, optimize=True, num_frames=None):
+    """Exports a MossFormer2 mask network to ONNX and optionally fuses the graph.
+
+    The exported graph takes the fbank features built by the MossFormer2 decoder
+    (fbank + delta + delta-delta, shape [B, T, num_mels * 3]) and returns the
+    predicted mask, so the result can stand in for ``SpeechModel.model``.
+
+    Args:
+        model (nn.Module): The loaded MossFormer2 mask network.
+        onnx_path (str or Path): Destination of the (optimized) ONNX graph.
+        num_mels (int): Number of mel bins used by the fbank front-end.
+        opset (int): ONNX opset version.
+        optimize (bool): Run onnxruntime's transformer optimizer to fuse
+                         LayerNorm/Gelu/MatMul patterns.
+        num_frames (int, optional): Export a static graph for exactly this many
+                                    fbank frames. By default the batch and time
+                                    axes are dynamic.
+
+    Returns:
+        str: Path of the ONNX graph written to disk.
+    """
+    onnx_path = str(onnx_path)
+    raw_path = onnx_path[:-len('.onnx')] + '.raw.onnx' if onnx_path.endswith('.onnx') else onnx_path + '.raw'
+    device = next(model.parameters()).device
+    dummy_input = torch.randn(1, num_frames or 200, num_mels * 3, device=device)
+    dynamic_axes = None
+    if num_frames is None:
+        dynamic_axes = {'fbanks': {0: 'B', 1: 'T'}, 'mask': {0: 'B', 1: 'T'}}
+
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy_input,),
+            raw_path,
+            opset_version=opset,
+            input_names=['fbanks'],
+            output_names=['mask'],
+            dynamic_axes=dynamic_axes,
+        )
+
+    if optimize:
+        try:
+            from onnxruntime.transformers import optimizer
+            # num_heads/hidden_size = 0 lets the optimizer infer them from the graph
+            optimized = optimizer.optimize_model(raw_path, model_type='bert', num_heads=0, hidden_size=0)
+            optimized.save_model_to_file(onnx_path)
+            os.remove(raw_path)
+            return onnx_path
+        except Exception as e:
+            print(f'ONNX graph fusion skipped: {e}')
+
+    os.replace(raw_path, onnx_path)
+    return onnx_path
+
+
+class OnnxMaskNet:
+    """Runs an exported MossFormer2 mask network with ONNX Runtime.
+
+    Instances are called exactly like the eager network (``model(fbanks)``) and
+    return a list whose last element is the predicted mask as a torch tensor on
+    the same device as the input, matching what the decoders expect.
+
+    Args:
+        onnx_path (str or Path): Path of the exported ONNX graph.
+        providers (list, optional): Execution providers in priority order, either names
+                                    or (name, options) tuples. Providers missing from the
+                                    installed onnxruntime are dropped. Defaults to CUDA
+                                    (if available) then CPU.
+    """
+
+    def __init__(self, onnx_path, providers=None):
+        import onnxruntime as ort
+
+        available = ort.get_available_providers()
+        if providers is None:
+            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+        providers = [p for p in providers if (p[0] if isinstance(p, tuple) else p) in available]
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), sess_options=sess_options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, fbanks):
+        mask = self.session.run(None, {self.input_name: fbanks.detach().cpu().numpy()})[-1]
+        return [torch.from_numpy(mask).to(fbanks.device)]
+
+    def eval(self):
+        return self